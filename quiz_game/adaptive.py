@@ -0,0 +1,199 @@
+import random
+import threading
+from collections import Counter
+
+from models import Question
+from question_sampler import QUESTION_COLUMNS
+from write_behind import WriteBehindQueue
+
+# Expected share of correct answers before a question has any history
+PRIOR_ACCURACY = {'Easy': 0.8, 'Medium': 0.6, 'Hard': 0.4}
+DEFAULT_PRIOR = 0.6
+# The prior counts as this many answers, so a few lucky guesses cannot
+# move a question to another bucket
+PRIOR_WEIGHT = 5
+
+# Quizzes of a player's recent history used for their rolling accuracy
+ROLLING_QUIZZES = 10
+
+# Share of questions every player should get right, whatever their skill
+TARGET_SUCCESS = 0.7
+
+
+def expected_accuracy(difficulty, served, correct):
+    """Smoothed share of correct answers for a question"""
+    prior = PRIOR_ACCURACY.get(difficulty, DEFAULT_PRIOR)
+    return (correct + prior * PRIOR_WEIGHT) / (served + PRIOR_WEIGHT)
+
+
+def target_question_accuracy(player_accuracy):
+    """Expected accuracy of the questions to serve a player with ``player_accuracy``
+
+    A player scoring TARGET_SUCCESS gets questions that TARGET_SUCCESS of
+    all players answer correctly. Every point above it moves them a point
+    towards harder questions and every point below it towards easier ones,
+    so strong and weak players alike drift back to the target instead of
+    away from it. New players (None) are treated as on target.
+    """
+    if player_accuracy is None:
+        return TARGET_SUCCESS
+    return min(max(2 * TARGET_SUCCESS - player_accuracy, 0.0), 1.0)
+
+
+class QuestionStatsWriter(WriteBehindQueue):
+    """Write-behind queue of answered questions
+
+    Each batch is folded into one (question_id, served, correct) increment
+    per question and written with ``Database.save_question_stats``.
+    """
+
+    def __init__(self, db, on_flush=None, batch_size=200, flush_interval=2.0):
+        super().__init__(self._flush, batch_size, flush_interval, name='question-stats-writer')
+        self.db = db
+        self.on_flush = on_flush
+
+    def record(self, question_id, is_correct):
+        """Queue one answered question"""
+        self.put((question_id, is_correct))
+
+    def _flush(self, batch):
+        served = Counter()
+        correct = Counter()
+        for question_id, is_correct in batch:
+            served[question_id] += 1
+            if is_correct:
+                correct[question_id] += 1
+        rows = [(question_id, count, correct[question_id]) for question_id, count in served.items()]
+        self.db.save_question_stats(rows)
+        if self.on_flush is not None:
+            self.on_flush(rows)
+
+
+class AdaptiveSelector:
+    """Pick quiz questions that keep each player near TARGET_SUCCESS
+
+    Players above the target get harder questions and players below it
+    easier ones; see ``target_question_accuracy``. Every question sits in
+    one of ``buckets`` equal-width accuracy buckets (bucket 0 is hardest).
+    The buckets are built with one pass over the questions when first
+    needed, extended with newly added questions, and updated in memory as
+    answer stats are flushed, so choosing k questions is O(k) and never
+    scans the table.
+    """
+
+    def __init__(self, db, buckets=5, batch_size=200, flush_interval=2.0):
+        self.db = db
+        self.bucket_count = buckets
+        self._lock = threading.Lock()
+        self._buckets = None         # bucket -> [question id]
+        self._entries = {}           # question id -> [difficulty, served, correct, bucket, position]
+        self._max_id = 0
+        self.writer = QuestionStatsWriter(db, self._apply, batch_size, flush_interval)
+
+    def bucket_for(self, accuracy):
+        """Bucket of a question with this expected accuracy (0 = hardest)"""
+        return min(max(int(accuracy * self.bucket_count), 0), self.bucket_count - 1)
+
+    def player_accuracy(self, player_name):
+        """Mean accuracy over the player's last ROLLING_QUIZZES quizzes, or None"""
+        history, _ = self.db.get_player_history_page(player_name, ROLLING_QUIZZES)
+        if not history:
+            return None
+        return sum(row[3] for row in history) / len(history) / 100.0
+
+    def sample(self, count, accuracy=None):
+        """Return up to ``count`` Questions for a player with rolling ``accuracy``
+
+        Questions come from the bucket of ``target_question_accuracy(accuracy)``
+        first, then from the nearest buckets.
+        """
+        if count <= 0:
+            return []
+        target = self.bucket_for(target_question_accuracy(accuracy))
+
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            with self._lock:
+                self._refresh(cursor)
+                picked = []
+                for bucket in self._search_order(target):
+                    ids = self._buckets[bucket]
+                    need = count - len(picked)
+                    picked.extend(random.sample(ids, min(need, len(ids))))
+                    if len(picked) == count:
+                        break
+            if not picked:
+                return []
+            placeholders = ",".join("?" * len(picked))
+            cursor.execute(f"SELECT {QUESTION_COLUMNS} FROM questions WHERE id IN ({placeholders})", picked)
+            return [Question.from_row(row) for row in cursor.fetchall()]
+
+    def _search_order(self, target):
+        """Buckets ordered by distance from ``target``"""
+        return sorted(range(self.bucket_count), key=lambda bucket: (abs(bucket - target), bucket))
+
+    def record_answer(self, question_id, is_correct):
+        """Queue an answer for the next batched stats update"""
+        self.writer.record(question_id, is_correct)
+
+    def _refresh(self, cursor):
+        """Build the buckets on first use, then add questions inserted since"""
+        if self._buckets is None:
+            self._buckets = [[] for _ in range(self.bucket_count)]
+        cursor.execute('''
+            SELECT q.id, q.difficulty, COALESCE(s.times_served, 0), COALESCE(s.times_correct, 0)
+            FROM questions q
+            LEFT JOIN question_stats s ON s.question_id = q.id
+            WHERE q.id > ?
+            ORDER BY q.id
+        ''', (self._max_id,))
+        for question_id, difficulty, served, correct in cursor.fetchall():
+            bucket = self.bucket_for(expected_accuracy(difficulty, served, correct))
+            self._entries[question_id] = [difficulty, served, correct, bucket, len(self._buckets[bucket])]
+            self._buckets[bucket].append(question_id)
+            self._max_id = question_id
+
+    def _apply(self, rows):
+        """Fold flushed (question_id, served, correct) increments into the buckets"""
+        with self._lock:
+            if self._buckets is None:
+                return
+            for question_id, served, correct in rows:
+                entry = self._entries.get(question_id)
+                if entry is None:
+                    continue
+                entry[1] += served
+                entry[2] += correct
+                bucket = self.bucket_for(expected_accuracy(entry[0], entry[1], entry[2]))
+                if bucket != entry[3]:
+                    self._move(question_id, entry, bucket)
+
+    def _move(self, question_id, entry, bucket):
+        # Swap-remove from the old bucket so the move is O(1)
+        old = self._buckets[entry[3]]
+        last = old.pop()
+        if last != question_id:
+            old[entry[4]] = last
+            self._entries[last][4] = entry[4]
+        entry[3] = bucket
+        entry[4] = len(self._buckets[bucket])
+        self._buckets[bucket].append(question_id)
+
+    def invalidate(self):
+        """Forget the buckets so they are rebuilt from the tables (needed after deletes)"""
+        with self._lock:
+            self._buckets = None
+            self._entries.clear()
+            self._max_id = 0
+
+    def stats(self):
+        """Number of questions in each bucket, hardest first"""
+        with self._lock:
+            return [len(ids) for ids in self._buckets] if self._buckets is not None else []
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        """Write any queued answer stats and stop the writer thread"""
+        self.writer.close()
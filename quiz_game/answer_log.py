@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Answer event log maintenance for the Quiz Game
+Rolls logged answers up into per-question aggregates and compacts the log.
+
+Usage:
+    python answer_log.py status
+    python answer_log.py rollup [--batch-size 10000]
+    python answer_log.py compact [--keep-days 30]
+
+Run rollup before compact; compact only deletes answers already rolled up.
+"""
+
+import sys
+from datetime import datetime, timezone
+
+from write_behind import WriteBehindQueue
+
+
+class AnswerLogger(WriteBehindQueue):
+    """Write-behind logger for individual answers
+
+    Answers are stamped when they are given and appended to the ``answers``
+    table in batches, so gameplay never waits on a commit per answer.
+    """
+
+    def __init__(self, db, batch_size=500, flush_interval=2.0):
+        super().__init__(db.save_answers, batch_size, flush_interval, name='answer-logger')
+        self.db = db
+
+    def log(self, player_id, question_id, chosen, is_correct, response_ms=None):
+        """Queue one answer event"""
+        answered_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self.put((player_id, question_id, chosen, int(bool(is_correct)), response_ms, answered_at))
+
+
+def log_status(db):
+    """Return (logged answers, rolled-up watermark, answers waiting for rollup)"""
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM answers")
+        logged = cursor.fetchone()[0]
+        cursor.execute("SELECT last_id FROM rollup_watermarks WHERE name = 'answers'")
+        row = cursor.fetchone()
+        watermark = row[0] if row else 0
+        cursor.execute("SELECT COUNT(*) FROM answers WHERE id > ?", (watermark,))
+        pending = cursor.fetchone()[0]
+    return logged, watermark, pending
+
+
+def main():
+    import argparse
+    from database import Database
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['status', 'rollup', 'compact'])
+    parser.add_argument('--batch-size', type=int, default=10000, help="answers per rollup transaction")
+    parser.add_argument('--keep-days', type=int, help="keep rolled-up answers newer than this")
+    args = parser.parse_args()
+
+    db = Database()
+    try:
+        if args.command == 'rollup':
+            count = db.rollup_answers(args.batch_size)
+            print(f"Rolled up {count} answers.")
+        elif args.command == 'compact':
+            count = db.compact_answers(args.keep_days)
+            print(f"Deleted {count} rolled-up answers.")
+        else:
+            logged, watermark, pending = log_status(db)
+            print(f"Answers in log: {logged}")
+            print(f"Rolled up through id: {watermark}")
+            print(f"Waiting for rollup: {pending}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
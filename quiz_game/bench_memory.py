@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Memory footprint of the game models
+Reports bytes per Question and bytes per live quiz session (Player + Quiz +
+QuizSession, with questions shared from the question cache).
+
+Usage:
+    python bench_memory.py [--questions 100000] [--sessions 10000] [--quiz-length 5]
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from models import Question, Player, Quiz
+from session import QuizSession
+from synthetic import generate_questions
+
+
+def measure(build):
+    """Return (result, bytes allocated by build())"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return result, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=100000)
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--quiz-length', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = [(i, *row) for i, row in enumerate(generate_questions(args.questions, seed=1), 1)]
+    # Strings are shared with the rows, so this measures the objects themselves
+    questions, question_bytes = measure(lambda: [Question.from_row(row) for row in rows])
+
+    def build_sessions():
+        sessions = []
+        for i in range(args.sessions):
+            start = (i * args.quiz_length) % (len(questions) - args.quiz_length)
+            quiz = Quiz(questions[start:start + args.quiz_length])
+            sessions.append(QuizSession(i, Player(f"player-{i}", i), quiz))
+        return sessions
+
+    _, session_bytes = measure(build_sessions)
+
+    print(f"Questions: {args.questions:>8}  {question_bytes / args.questions:8.1f} bytes/question")
+    print(f"Sessions:  {args.sessions:>8}  {session_bytes / args.sessions:8.1f} bytes/session "
+          f"({args.quiz_length} shared questions each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Question sampling benchmark
+Compares the indexed sampler against the old ORDER BY RANDOM() query.
+
+Usage:
+    python bench_sampling.py [--sizes 1000 100000 1000000] [--count 10] [--repeat 20]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from database import Database
+from question_sampler import QUESTION_COLUMNS
+from synthetic import fill_questions
+
+LEGACY_QUERY = f"SELECT {QUESTION_COLUMNS} FROM questions ORDER BY RANDOM() LIMIT ?"
+
+
+def time_call(func, repeat):
+    """Return the mean wall time of ``func`` in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run(sizes, count, repeat):
+    print(f"{'Questions':>10} {'ORDER BY RANDOM()':>18} {'Sampler':>10} {'Sampler+filter':>15} {'Speedup':>8}")
+    print("-" * 65)
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, 'bench.db'))
+            fill_questions(db, size, seed=size)
+
+            def legacy():
+                with db.connection() as conn:
+                    conn.execute(LEGACY_QUERY, (count,)).fetchall()
+
+            legacy_ms = time_call(legacy, repeat)
+            sampler_ms = time_call(lambda: db.get_random_questions(count), repeat)
+            filtered_ms = time_call(
+                lambda: db.get_random_questions(count, category="Science", difficulty="Hard"), repeat
+            )
+            db.close()
+
+        speedup = legacy_ms / sampler_ms if sampler_ms else float('inf')
+        print(f"{size:>10} {legacy_ms:>15.2f} ms {sampler_ms:>7.2f} ms {filtered_ms:>12.2f} ms {speedup:>7.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--count', type=int, default=10, help="questions drawn per quiz")
+    parser.add_argument('--repeat', type=int, default=20, help="draws timed per size")
+    args = parser.parse_args()
+    run(args.sizes, args.count, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
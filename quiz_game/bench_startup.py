@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the console game
+Launches ``python main.py`` repeatedly and times how long each run takes to
+show the name prompt, and then the main menu once a name has been entered
+(the first query). Every run uses a copy of the database, so the real file
+is never touched. A fresh, empty database is measured separately, because
+its first query also creates the schema and seeds the sample questions.
+
+Usage:
+    python bench_startup.py [--runs 20] [--target-ms 50] [--db quiz_game.db]
+
+Exits with status 1 when the median time to the name prompt is over
+--target-ms.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from metrics import summarize
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROMPT = b"Enter your name:"
+MENU = b"MAIN MENU"
+
+
+def read_until(stream, marker, buffer):
+    """Read from ``stream`` until ``marker`` shows up; return what was read"""
+    while marker not in buffer:
+        chunk = os.read(stream.fileno(), 4096)
+        if not chunk:
+            raise RuntimeError(f"Game exited before printing {marker.decode()!r}")
+        buffer += chunk
+    return buffer
+
+
+def start_once(db_path):
+    """Run the game once; return (ms to the name prompt, ms to the main menu)"""
+    env = dict(os.environ, QUIZ_GAME_DB=db_path, TERM=os.environ.get('TERM', 'dumb'))
+    env.pop('QUIZ_GAME_SHARDS', None)
+    started = time.perf_counter()
+    game = subprocess.Popen([sys.executable, '-u', 'main.py'], cwd=HERE, env=env,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        output = read_until(game.stdout, PROMPT, b"")
+        prompt_ms = (time.perf_counter() - started) * 1000
+        game.stdin.write(b"bench-startup\n")
+        game.stdin.flush()
+        read_until(game.stdout, MENU, output)
+        menu_ms = (time.perf_counter() - started) * 1000
+    finally:
+        # EOF at the menu prompt ends the game
+        game.stdin.close()
+        game.stdout.close()
+        game.wait()
+    return prompt_ms, menu_ms
+
+
+def measure(db_path, runs, fresh):
+    """Time ``runs`` starts against copies of ``db_path`` (or empty files when fresh)"""
+    prompt, menu = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for run in range(runs):
+            path = os.path.join(tmp, f"startup-{run}.db" if fresh else "startup.db")
+            if not fresh and not os.path.exists(path):
+                shutil.copyfile(db_path, path)
+            prompt_ms, menu_ms = start_once(path)
+            prompt.append(prompt_ms)
+            menu.append(menu_ms)
+    return summarize(prompt), summarize(menu)
+
+
+def main():
+    from database import DEFAULT_DB_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="database file to copy for the existing-database runs")
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--target-ms', type=float, default=50.0, help="allowed median time to the name prompt")
+    args = parser.parse_args()
+
+    # One untimed start so the first measured run does not pay for a cold disk cache
+    measure(args.db, 1, False)
+
+    print(f"{'Database':<10} {'Milestone':<12} {'p50 ms':>9} {'p90 ms':>9} {'max ms':>9}")
+    results = {}
+    for label, fresh in (('existing', False), ('fresh', True)):
+        prompt, menu = measure(args.db, args.runs, fresh)
+        results[label] = prompt
+        for milestone, stats in (('name prompt', prompt), ('main menu', menu)):
+            print(f"{label:<10} {milestone:<12} {stats['p50']:>9.1f} {stats['p90']:>9.1f} {stats['max']:>9.1f}")
+
+    p50 = results['existing']['p50']
+    if p50 > args.target_ms:
+        print(f"\n❌ Median cold start {p50:.1f} ms is over the {args.target_ms:.0f} ms target")
+        return 1
+    print(f"\n✅ Median cold start {p50:.1f} ms is within the {args.target_ms:.0f} ms target")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
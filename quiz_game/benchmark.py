@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Quiz Game database and engine hot paths
+Builds synthetic databases of several sizes, times each operation and
+optionally compares the results against a stored baseline.
+
+Usage:
+    python benchmark.py [--sizes small medium] [--repeat 200] [--output results.json]
+    python benchmark.py --save-baseline benchmark_baseline.json
+    python benchmark.py --baseline benchmark_baseline.json [--threshold 0.25]
+
+Exits with status 1 when any operation's median is slower than the
+baseline by more than the threshold.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from database import Database
+from metrics import summarize
+from quiz_pack import build_pack, open_pack
+from session import SessionManager
+from synthetic import fill_questions, fill_players, fill_scores
+
+# name -> (questions, players, scores)
+SIZES = {
+    'small': (1000, 100, 1000),
+    'medium': (10000, 1000, 100000),
+    'large': (100000, 10000, 1000000),
+}
+
+
+def build_database(path, questions, players, scores, seed=42):
+    """Create a synthetic database and return (db, player ids)"""
+    db = Database(path)
+    fill_questions(db, questions, seed=seed)
+    player_ids = fill_players(db, players)
+    fill_scores(db, scores, player_ids, seed=seed)
+    return db, player_ids
+
+
+def time_operation(func, repeat):
+    """Call ``func`` ``repeat`` times and summarize the latencies in ms"""
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return summarize(latencies)
+
+
+def benchmark_size(name, repeat, seed=42):
+    """Run every operation against a fresh database of the given size"""
+    questions, players, scores = SIZES[name]
+    rng = random.Random(seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        db, player_ids = build_database(os.path.join(tmp, 'bench.db'), questions, players, scores, seed)
+        setup_seconds = time.perf_counter() - started
+        sessions = SessionManager(db)
+        pack_path = os.path.join(tmp, 'bench.qpk')
+        build_pack(db, pack_path)
+        pack_sessions = SessionManager(db, pack=open_pack(pack_path))
+        new_names = (f"bench-new-{i}" for i in itertools.count())
+
+        def play_quiz():
+            session = sessions.start_session(f"player-{rng.randrange(players)}", 5)
+            while not session.is_finished:
+                session.submit_answer(rng.choice("ABCD"))
+            sessions.finish(session.id)
+
+        operations = {
+            'get_random_questions': lambda: db.get_random_questions(10),
+            'get_leaderboard': lambda: db.get_leaderboard(10),
+            'get_player_history': lambda: db.get_player_history(f"player-{rng.randrange(players)}"),
+            'create_quiz': lambda: sessions.create_quiz(10),
+            'create_quiz_pack': lambda: pack_sessions.create_quiz(10),
+            'get_player_rank': lambda: db.get_player_rank(f"player-{rng.randrange(players)}"),
+            'add_player': lambda: db.add_player(next(new_names)),
+            'save_score': lambda: db.save_score(rng.choice(player_ids), rng.randint(0, 5), 5),
+            'quiz_playthrough': play_quiz,
+        }
+
+        results = {}
+        for op_name, func in operations.items():
+            results[op_name] = time_operation(func, repeat)
+        db.close()
+
+    return {
+        'questions': questions,
+        'players': players,
+        'scores': scores,
+        'setup_seconds': round(setup_seconds, 3),
+        'operations': results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (size, operation, baseline p50, current p50) regressions"""
+    regressions = []
+    for size, current in results['sizes'].items():
+        previous = baseline.get('sizes', {}).get(size)
+        if not previous:
+            continue
+        for op_name, stats in current['operations'].items():
+            old = previous['operations'].get(op_name)
+            if old and old['p50'] > 0 and stats['p50'] > old['p50'] * (1 + threshold):
+                regressions.append((size, op_name, old['p50'], stats['p50']))
+    return regressions
+
+
+def print_results(results):
+    for size, data in results['sizes'].items():
+        print(f"\n{size}: {data['questions']} questions, {data['players']} players, "
+              f"{data['scores']} scores (setup {data['setup_seconds']}s)")
+        print(f"   {'Operation':<22} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+        for op_name, stats in data['operations'].items():
+            print(f"   {op_name:<22} {stats['p50']:>9.3f} {stats['p99']:>9.3f} {stats['mean']:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=200, help="timed calls per operation")
+    parser.add_argument('--output', help="write the JSON results to this file")
+    parser.add_argument('--baseline', help="compare against this JSON results file")
+    parser.add_argument('--save-baseline', metavar='PATH', help="store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed p50 slowdown (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': args.repeat,
+        },
+        'sizes': {},
+    }
+    for size in args.sizes:
+        results['sizes'][size] = benchmark_size(size, args.repeat)
+
+    print_results(results)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for size, op_name, old, new in regressions:
+                print(f"   {size}/{op_name}: p50 {old:.3f} ms -> {new:.3f} ms")
+            return 1
+        print(f"\n✅ No regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from instrumentation import Instrumentation, InstrumentedConnection
+
+MEMORY = ':memory:'
+
+_memory_names = itertools.count(1)
+
+
+def is_uri(location):
+    return location.startswith('file:')
+
+
+def is_memory(location):
+    """True for ':memory:' and for in-memory URIs (mode=memory or the memdb VFS)"""
+    if location == MEMORY:
+        return True
+    query = location.partition('?')[2]
+    return is_uri(location) and ('mode=memory' in query or 'vfs=memdb' in query)
+
+
+def resolve_location(location):
+    """Turn ':memory:' into a named in-memory database every pooled connection can open
+
+    Plain ':memory:' would give each connection its own empty database. The
+    memdb VFS (SQLite 3.36+) shares one database between connections with
+    normal locking; older SQLite falls back to a shared-cache memory URI.
+    Paths and other URIs are returned unchanged.
+    """
+    if location != MEMORY:
+        return location
+    name = f"quiz-game-{next(_memory_names)}-{os.urandom(4).hex()}"
+    if sqlite3.sqlite_version_info >= (3, 36, 0):
+        return f"file:/{name}?vfs=memdb"
+    return f"file:{name}?mode=memory&cache=shared"
+
+
+def location_key(location):
+    """Registry key for a database location"""
+    return location if is_uri(location) else os.path.abspath(location)
+
+
+class ConnectionPool:
+    """Thread-safe pool of long-lived SQLite connections
+
+    Each thread keeps the connection it acquired for as long as it holds it,
+    so nested ``connection()`` blocks reuse the same connection and share its
+    transaction. When the outermost block exits the connection goes back to
+    the idle list instead of being closed.
+
+    ``db_path`` may also be a ``file:`` URI. For an in-memory database the
+    pool holds one extra anchor connection open until ``close()``, because
+    SQLite drops the database when its last connection closes.
+    """
+
+    DEFAULT_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,       # negative = KiB, so ~16 MB page cache
+        'mmap_size': 268435456,     # 256 MB
+        'busy_timeout': 5000,       # ms
+    }
+
+    def __init__(self, db_path, size=5, timeout=30.0, pragmas=None):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = dict(self.DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._all = []
+        self._local = threading.local()
+        self._closed = False
+        self.instrumentation = None
+        self.uri = is_uri(db_path)
+        self._anchor = self.open_connection() if is_memory(db_path) else None
+
+    def open_connection(self):
+        """Open a new connection and apply the configured pragmas"""
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False, uri=self.uri)
+        else:
+            started = time.perf_counter()
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False,
+                                   uri=self.uri, factory=InstrumentedConnection)
+            instrumentation.attach(conn)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        if instrumentation is not None:
+            instrumentation.record_connection_open((time.perf_counter() - started) * 1000)
+        return conn
+
+    def enable_instrumentation(self):
+        """Start collecting timings; idle connections are reopened instrumented"""
+        if self.instrumentation is None:
+            self.instrumentation = Instrumentation()
+            self._drop_idle()
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        """Stop collecting timings and go back to plain connections"""
+        if self.instrumentation is not None:
+            self.instrumentation = None
+            self._drop_idle()
+
+    def _drop_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            for conn in idle:
+                self._all.remove(conn)
+        for conn in idle:
+            conn.close()
+
+    def acquire(self):
+        """Get this thread's connection, checking one out of the pool if needed"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            return conn
+
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(
+                f"Timed out waiting for a pooled connection (pool size {self.size})"
+            )
+
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self.open_connection()
+                with self._lock:
+                    self._all.append(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn):
+        """Hand the connection back once the outermost user is done with it"""
+        if getattr(self._local, 'conn', None) is not conn:
+            raise sqlite3.ProgrammingError("Connection was not acquired by this thread")
+
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.append(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; the outermost block commits or rolls back"""
+        conn = self.acquire()
+        outermost = self._local.depth == 1
+        if outermost:
+            self._local.after_commit = []
+        try:
+            yield conn
+            if outermost:
+                conn.commit()
+        except BaseException:
+            if outermost:
+                conn.rollback()
+                self._local.after_commit = []
+            raise
+        finally:
+            self.release(conn)
+
+        if outermost:
+            callbacks, self._local.after_commit = self._local.after_commit, []
+            for callback in callbacks:
+                callback()
+
+    def after_commit(self, callback):
+        """Run ``callback`` once the current thread's transaction commits
+
+        Callbacks are dropped if the transaction rolls back. Outside of a
+        ``connection()`` block the callback runs immediately.
+        """
+        if getattr(self._local, 'conn', None) is None:
+            callback()
+        else:
+            self._local.after_commit.append(callback)
+
+    def close(self):
+        """Close every idle connection; busy ones close when released
+
+        An in-memory database is discarded once its anchor is closed here.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            anchor, self._anchor = self._anchor, None
+        for conn in idle:
+            conn.close()
+        if anchor is not None:
+            anchor.close()
+
+    def stats(self):
+        """Return a snapshot of pool usage"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': len(self._all),
+                'idle': len(self._idle),
+            }
+
+
+_pools = {}
+_pool_refs = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, size=5, pragmas=None):
+    """Return the process-wide pool for ``db_path``, creating it on first use
+
+    Every ``Database`` pointing at the same file shares one pool, so the game
+    engine and the database viewer never compete with separate connection sets.
+    Each call takes a reference that ``close_pool`` gives back.
+    """
+    key = location_key(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_path, size=size, pragmas=pragmas)
+            _pools[key] = pool
+            _pool_refs[key] = 0
+        _pool_refs[key] += 1
+        return pool
+
+
+def close_pool(db_path):
+    """Give back one reference to the shared pool for ``db_path``
+
+    The pool is closed and forgotten when its last user lets go. Returns
+    True if this call closed it.
+    """
+    key = location_key(db_path)
+    with _pools_lock:
+        if key not in _pools:
+            return False
+        _pool_refs[key] -= 1
+        if _pool_refs[key] > 0:
+            return False
+        pool = _pools.pop(key)
+        del _pool_refs[key]
+    pool.close()
+    return True
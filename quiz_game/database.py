@@ -2,182 +2,704 @@ import sqlite3
 from datetime import datetime
 import os
 
+import migrations
+from connection_pool import get_pool, close_pool, is_memory, resolve_location
+from instrumentation import instrumented
+from models import Question
+from question_cache import get_question_cache, drop_question_cache
+from question_sampler import QuestionSampler
+from question_search import fts_query, normalize_question_text, question_text_hash
+from ranking import RankIndex
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), 'quiz_game.db')
+
+def default_location():
+    """Database location from QUIZ_GAME_DB, or quiz_game.db next to the source
+    
+    Accepts a file path, ':memory:' or a ``file:`` URI such as
+    ``file:quiz?mode=memory&cache=shared``.
+    """
+    return os.environ.get('QUIZ_GAME_DB') or DEFAULT_DB_PATH
+
+# Locations whose schema this process has already brought up to date
+_initialized = set()
+
+INSERT_QUESTION_SQL = '''
+    INSERT INTO questions (text, option_a, option_b, option_c, option_d, correct_answer, category, difficulty, text_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Batches at least this big are added to the search index in one statement
+FTS_BULK_ROWS = 200
+
+# Values bound per IN (...) lookup, well under SQLite's host parameter limit
+# (999 before SQLite 3.32)
+LOOKUP_CHUNK = 500
+
+class DuplicateQuestionError(ValueError):
+    """Raised when a new question's normalized text matches an existing question"""
+
+def _stage_without_wal(source):
+    """Copy a WAL-mode database so it can be backed up into memory
+    
+    A backup copies the header bytes that mark WAL mode, and an in-memory
+    database cannot open in WAL mode. Returns (connection, temporary file or None).
+    """
+    if hasattr(source, 'serialize'):
+        data = bytearray(source.serialize())
+        data[18] = data[19] = 1  # file format read/write version 1 = rollback journal
+        staging = sqlite3.connect(':memory:')
+        staging.deserialize(bytes(data))
+        staging_file = None
+    else:
+        import tempfile
+        fd, staging_file = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        staging = sqlite3.connect(staging_file)
+        source.backup(staging)
+        staging.execute("PRAGMA journal_mode = DELETE")
+    source.close()
+    return staging, staging_file
+
 class Database:
-    def __init__(self):
-        self.db_path = os.path.join(os.path.dirname(__file__), 'quiz_game.db')
-        self.init_database()
+    def __init__(self, db_path=None, pool_size=5, pragmas=None, instrument=None, load_from=None, shard=False):
+        self.db_path = resolve_location(db_path or default_location())
+        # A shard file only gets the players/scores schema; see ShardedDatabase
+        self.shard = shard
+        self.in_memory = is_memory(self.db_path)
+        self.pool = get_pool(self.db_path, size=pool_size, pragmas=pragmas)
+        self.closed = False
+        if instrument is None:
+            instrument = os.environ.get('QUIZ_GAME_INSTRUMENT') == '1'
+        if instrument:
+            self.pool.enable_instrumentation()
+        self.sampler = QuestionSampler(self)
+        self.rank_index = RankIndex(self)
+        self.question_cache = get_question_cache(self)
+        if load_from is None and self.in_memory:
+            load_from = os.environ.get('QUIZ_GAME_LOAD')
+        if load_from:
+            self.load(load_from)
     
     def get_connection(self):
+        """Open a standalone connection that is not managed by the pool"""
+        if self.db_path not in _initialized:
+            self.init_database()
         try:
-            return sqlite3.connect(self.db_path)
+            return self.pool.open_connection()
         except sqlite3.Error as e:
             print(f"Error connecting to SQLite: {e}")
             raise
     
-    def init_database(self):
-        """Initialize the database with required tables"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def connection(self):
+        """Borrow a pooled connection: ``with db.connection() as conn: ...``
+
+        Nested blocks on the same thread share one connection and one
+        transaction, which is committed when the outermost block exits.
+        The schema is checked on first use, once per location per process.
+        """
+        if self.db_path not in _initialized:
+            self.init_database()
+        return self.pool.connection()
+    
+    @property
+    def instrumentation(self):
+        """Timing stats collector, or None when instrumentation is off"""
+        return self.pool.instrumentation
+    
+    def close(self):
+        """Release this object's hold on the shared pool for its database file
         
-        # Create questions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS questions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                text TEXT NOT NULL,
-                option_a TEXT NOT NULL,
-                option_b TEXT NOT NULL,
-                option_c TEXT NOT NULL,
-                option_d TEXT NOT NULL,
-                correct_answer TEXT NOT NULL,
-                category TEXT DEFAULT 'General',
-                difficulty TEXT DEFAULT 'Medium'
-            )
-        ''')
-        
-        # Create players table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS players (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create scores table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS scores (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                player_id INTEGER,
-                score INTEGER NOT NULL,
-                total_questions INTEGER NOT NULL,
-                quiz_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (player_id) REFERENCES players(id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        The pool closes once every Database on the file has been closed, so
+        other objects sharing it keep working. With instrumentation on and
+        QUIZ_GAME_STATS_FILE set, the collected stats are written there first.
+        An in-memory database is snapshotted to QUIZ_GAME_SNAPSHOT, if set,
+        before it is discarded.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        stats_file = os.environ.get('QUIZ_GAME_STATS_FILE')
+        if self.instrumentation is not None and stats_file:
+            self.instrumentation.dump(stats_file)
+        snapshot_file = os.environ.get('QUIZ_GAME_SNAPSHOT')
+        if self.in_memory and snapshot_file:
+            self.snapshot(snapshot_file)
+        if close_pool(self.db_path):
+            _initialized.discard(self.db_path)
+            drop_question_cache(self.db_path)
+    
+    def snapshot(self, path):
+        """Copy the whole database to the file at ``path`` with the backup API"""
+        target = sqlite3.connect(path)
+        try:
+            with self.connection() as conn:
+                conn.backup(target)
+        finally:
+            target.close()
+    
+    def load(self, path):
+        """Replace this database's contents with the file at ``path``
+        
+        Uses the backup API, then applies any pending migrations and drops
+        the cached question ids and Question objects.
+        """
+        import pathlib
+        
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No database file at {path}")
+        source = sqlite3.connect(pathlib.Path(os.path.abspath(path)).as_uri() + "?mode=ro", uri=True)
+        staging_file = None
+        try:
+            if self.in_memory and source.execute("PRAGMA journal_mode").fetchone()[0] == 'wal':
+                source, staging_file = _stage_without_wal(source)
+            with self.pool.connection() as conn:
+                source.backup(conn)
+        finally:
+            source.close()
+            if staging_file:
+                os.remove(staging_file)
+        _initialized.discard(self.db_path)
+        self.init_database()
+        self.sampler.invalidate()
+        self.question_cache.invalidate()
+        self.rank_index.invalidate()
+    
+    def init_database(self):
+        """Initialize the database, applying any pending schema migrations"""
+        with self.pool.connection() as conn:
+            migrations.migrate(conn, shard=self.shard)
+        _initialized.add(self.db_path)
     
+    @instrumented
     def add_sample_questions(self):
-        """Add some sample questions to get started"""
-        sample_questions = [
-            ("What is the capital of France?", "London", "Berlin", "Paris", "Madrid", "C", "Geography", "Easy"),
-            ("Which planet is known as the Red Planet?", "Venus", "Mars", "Jupiter", "Saturn", "B", "Science", "Easy"),
-            ("What is 2 + 2?", "3", "4", "5", "6", "B", "Math", "Easy"),
-            ("Who wrote 'Romeo and Juliet'?", "Charles Dickens", "William Shakespeare", "Jane Austen", "Mark Twain", "B", "Literature", "Medium"),
-            ("What is the largest mammal in the world?", "Elephant", "Blue Whale", "Giraffe", "Hippopotamus", "B", "Science", "Medium"),
-            ("In which year did World War II end?", "1944", "1945", "1946", "1947", "B", "History", "Medium"),
-            ("What is the chemical symbol for gold?", "Go", "Gd", "Au", "Ag", "C", "Science", "Hard"),
-            ("Which programming language is known for its use in web development?", "C++", "Java", "JavaScript", "Assembly", "C", "Technology", "Medium"),
-            ("What is the square root of 144?", "11", "12", "13", "14", "B", "Math", "Easy"),
-            ("Who painted the Mona Lisa?", "Vincent van Gogh", "Pablo Picasso", "Leonardo da Vinci", "Michelangelo", "C", "Art", "Medium")
-        ]
-        
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Check if questions already exist
-        cursor.execute("SELECT COUNT(*) FROM questions")
-        if cursor.fetchone()[0] == 0:
-            for question in sample_questions:
-                cursor.execute('''
-                    INSERT INTO questions (text, option_a, option_b, option_c, option_d, correct_answer, category, difficulty)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', question)
-            conn.commit()
-            print("Sample questions added to database!")
+        """Re-seed the sample questions if the question bank has been emptied
         
-        conn.close()
+        New databases are seeded once by a migration, so startup does not
+        need to call this.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Check if questions already exist
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM questions)")
+            if not cursor.fetchone()[0]:
+                self.add_questions(migrations.SAMPLE_QUESTIONS)
+                print("Sample questions added to database!")
     
+    @instrumented
     def add_question(self, text, option_a, option_b, option_c, option_d, correct_answer, category="General", difficulty="Medium"):
-        """Add a new question to the database"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """Add a new question to the database
         
-        cursor.execute('''
-            INSERT INTO questions (text, option_a, option_b, option_c, option_d, correct_answer, category, difficulty)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (text, option_a, option_b, option_c, option_d, correct_answer, category, difficulty))
+        Raises DuplicateQuestionError if the same question, ignoring case,
+        accents, punctuation and spacing, is already in the bank.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            if self.find_existing_questions([text]):
+                raise DuplicateQuestionError(f"This question is already in the database: {text!r}")
+            cursor.execute(INSERT_QUESTION_SQL, (text, option_a, option_b, option_c, option_d, correct_answer,
+                                                 category, difficulty, question_text_hash(text)))
+            question = Question(cursor.lastrowid, text, option_a, option_b, option_c, option_d, correct_answer, category, difficulty)
+            self.pool.after_commit(lambda: self.question_cache.add(question))
+            return question.id
+    
+    @instrumented
+    def add_questions(self, rows):
+        """Insert many question tuples (in add_question argument order) with one executemany
         
-        conn.commit()
-        conn.close()
+        Runs in the caller's transaction when called inside ``db.connection()``,
+        so batched imports commit once at the end. Does not check for
+        duplicates; use ``find_existing_questions`` first, as the importer does.
+        """
+        rows = list(rows)
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            # The per-row search index trigger costs far more than indexing a
+            # large batch with one INSERT ... SELECT, so drop it for the batch
+            # (DDL is transactional, so a failure restores it)
+            bulk = len(rows) >= FTS_BULK_ROWS and cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'questions_fts_insert'").fetchone()
+            if bulk:
+                last_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM questions").fetchone()[0]
+                cursor.execute("DROP TRIGGER questions_fts_insert")
+            cursor.executemany(INSERT_QUESTION_SQL, [(*row, question_text_hash(row[0])) for row in rows])
+            inserted = cursor.rowcount
+            if bulk:
+                cursor.execute(migrations.FTS_INDEX_NEW_QUESTIONS_SQL, (last_id,))
+                cursor.execute(migrations.FTS_INSERT_TRIGGER_SQL)
+            categories = {row[6] for row in rows}
+            self.pool.after_commit(lambda: self.question_cache.invalidate(categories))
+            return inserted
     
-    def get_random_questions(self, count=5):
-        """Get random questions from the database"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    @instrumented
+    def find_existing_questions(self, texts):
+        """Return the subset of ``texts`` that already exist as questions
         
-        cursor.execute('''
-            SELECT id, text, option_a, option_b, option_c, option_d, correct_answer, category, difficulty
-            FROM questions ORDER BY RANDOM() LIMIT ?
-        ''', (count,))
+        Texts match when they are equal after ``normalize_question_text``.
+        Candidates come from the text_hash index, so the table is never
+        scanned, and are compared in full to rule out hash collisions. Large
+        sets are looked up in chunks of ``LOOKUP_CHUNK`` hashes.
+        """
+        by_hash = {}
+        for text in texts:
+            by_hash.setdefault(question_text_hash(text), []).append(text)
+        if not by_hash:
+            return set()
+        existing = set()
+        hashes = list(by_hash)
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(hashes), LOOKUP_CHUNK):
+                chunk = hashes[start:start + LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"SELECT text_hash, text FROM questions WHERE text_hash IN ({placeholders})",
+                               chunk)
+                for text_hash, stored in cursor.fetchall():
+                    key = normalize_question_text(stored)
+                    existing.update(text for text in by_hash[text_hash] if normalize_question_text(text) == key)
+        return existing
+    
+    @instrumented
+    def search_questions(self, terms, limit=20):
+        """Full-text search over question text and options, best matches first
         
-        questions = cursor.fetchall()
-        conn.close()
-        return questions
+        Every word must appear; the last one may be a prefix. Returns
+        ``(id, text, category, difficulty)`` rows. SQLite builds without FTS5
+        fall back to a substring scan of the question text.
+        """
+        query = fts_query(terms)
+        if query is None:
+            return []
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'questions_fts'")
+            if cursor.fetchone():
+                cursor.execute('''
+                    SELECT q.id, q.text, q.category, q.difficulty
+                    FROM questions_fts f
+                    JOIN questions q ON q.id = f.rowid
+                    WHERE questions_fts MATCH ?
+                    ORDER BY f.rank
+                    LIMIT ?
+                ''', (query, limit))
+            else:
+                cursor.execute('''
+                    SELECT id, text, category, difficulty FROM questions
+                    WHERE instr(lower(text), lower(?)) > 0 ORDER BY id LIMIT ?
+                ''', (terms.strip(), limit))
+            return cursor.fetchall()
+    
+    @instrumented
+    def get_random_questions(self, count=5, category=None, difficulty=None):
+        """Get random questions from the database, optionally filtered"""
+        return self.sampler.sample(count, category=category, difficulty=difficulty)
     
+    @instrumented
     def add_player(self, name):
         """Add a new player or get existing player ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('INSERT INTO players (name) VALUES (?)', (name,))
-            player_id = cursor.lastrowid
-        except sqlite3.IntegrityError:
-            # Player already exists, get their ID
-            cursor.execute('SELECT id FROM players WHERE name = ?', (name,))
-            player_id = cursor.fetchone()[0]
-        
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('INSERT INTO players (name) VALUES (?)', (name,))
+                player_id = cursor.lastrowid
+            except sqlite3.IntegrityError:
+                # Player already exists, get their ID
+                cursor.execute('SELECT id FROM players WHERE name = ?', (name,))
+                player_id = cursor.fetchone()[0]
         return player_id
     
+    @instrumented
     def save_score(self, player_id, score, total_questions):
         """Save a player's quiz score"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            self._record_score(conn.cursor(), player_id, score, total_questions)
+    
+    @instrumented
+    def save_scores(self, rows):
+        """Save many (player_id, score, total_questions[, quiz_date]) rows in one transaction"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            for row in rows:
+                self._record_score(cursor, *row)
+    
+    @instrumented
+    def save_question_stats(self, rows):
+        """Add many (question_id, times_served, times_correct) increments in one transaction"""
+        with self.connection() as conn:
+            conn.cursor().executemany('''
+                INSERT INTO question_stats (question_id, times_served, times_correct)
+                VALUES (?, ?, ?)
+                ON CONFLICT (question_id) DO UPDATE SET
+                    times_served = times_served + excluded.times_served,
+                    times_correct = times_correct + excluded.times_correct
+            ''', rows)
+    
+    @instrumented
+    def save_answers(self, rows):
+        """Append many (player_id, question_id, chosen, is_correct, response_ms, answered_at) events"""
+        with self.connection() as conn:
+            conn.cursor().executemany('''
+                INSERT INTO answers (player_id, question_id, chosen, is_correct, response_ms, answered_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+    
+    @instrumented
+    def rollup_answers(self, batch_size=10000):
+        """Fold answers past the watermark into question_answer_stats
         
-        cursor.execute('''
-            INSERT INTO scores (player_id, score, total_questions)
-            VALUES (?, ?, ?)
-        ''', (player_id, score, total_questions))
+        Works in id ranges of ``batch_size`` answers; each range and the new
+        watermark commit together, so an interrupted rollup resumes without
+        counting anything twice. Returns the number of answers rolled up.
+        """
+        rolled_up = 0
+        while True:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT last_id FROM rollup_watermarks WHERE name = 'answers'")
+                row = cursor.fetchone()
+                start = row[0] if row else 0
+                cursor.execute('''
+                    SELECT MAX(id), COUNT(*) FROM (
+                        SELECT id FROM answers WHERE id > ? ORDER BY id LIMIT ?
+                    )
+                ''', (start, batch_size))
+                end, count = cursor.fetchone()
+                if not count:
+                    return rolled_up
+        
+                cursor.execute('''
+                    INSERT INTO question_answer_stats
+                        (question_id, answers, correct, total_response_ms, chose_a, chose_b, chose_c, chose_d)
+                    SELECT question_id, COUNT(*), SUM(is_correct), COALESCE(SUM(response_ms), 0),
+                           SUM(chosen = 'A'), SUM(chosen = 'B'), SUM(chosen = 'C'), SUM(chosen = 'D')
+                    FROM answers
+                    WHERE id > ? AND id <= ?
+                    GROUP BY question_id
+                    ON CONFLICT (question_id) DO UPDATE SET
+                        answers = answers + excluded.answers,
+                        correct = correct + excluded.correct,
+                        total_response_ms = total_response_ms + excluded.total_response_ms,
+                        chose_a = chose_a + excluded.chose_a,
+                        chose_b = chose_b + excluded.chose_b,
+                        chose_c = chose_c + excluded.chose_c,
+                        chose_d = chose_d + excluded.chose_d
+                ''', (start, end))
+                cursor.execute('''
+                    INSERT INTO rollup_watermarks (name, last_id) VALUES ('answers', ?)
+                    ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id
+                ''', (end,))
+                rolled_up += count
+    
+    @instrumented
+    def compact_answers(self, keep_days=None):
+        """Delete answers that are already rolled up
         
-        conn.commit()
-        conn.close()
+        With ``keep_days``, rolled-up answers from the last ``keep_days`` days
+        are kept for ad-hoc analysis. Returns the number of rows deleted.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT last_id FROM rollup_watermarks WHERE name = 'answers'")
+            row = cursor.fetchone()
+            if not row:
+                return 0
+            if keep_days is None:
+                cursor.execute("DELETE FROM answers WHERE id <= ?", (row[0],))
+            else:
+                cursor.execute('''
+                    DELETE FROM answers
+                    WHERE id <= ? AND answered_at < datetime('now', ?)
+                ''', (row[0], f"-{int(keep_days)} days"))
+            return cursor.rowcount
     
-    def get_leaderboard(self, limit=10):
-        """Get the top scores for the leaderboard"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def _record_score(self, cursor, player_id, score, total_questions, quiz_date=None):
+        """Insert a score and update the leaderboard and player stats in the caller's transaction"""
+        cursor.execute('''
+            INSERT INTO scores (player_id, score, total_questions, quiz_date, percentage)
+            VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ROUND((? * 100.0 / ?), 2))
+        ''', (player_id, score, total_questions, quiz_date, score, total_questions))
+        score_id = cursor.lastrowid
         
         cursor.execute('''
-            SELECT p.name, s.score, s.total_questions, s.quiz_date,
-                   ROUND((s.score * 100.0 / s.total_questions), 2) as percentage
-            FROM scores s
-            JOIN players p ON s.player_id = p.id
-            ORDER BY percentage DESC, s.score DESC, s.quiz_date DESC
-            LIMIT ?
-        ''', (limit,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        return results
+            INSERT INTO player_best (player_id, score_id, score, total_questions, percentage, quiz_date)
+            SELECT player_id, id, score, total_questions, percentage, quiz_date
+            FROM scores WHERE id = ? AND player_id IS NOT NULL
+            ON CONFLICT (player_id) DO UPDATE SET
+                score_id = excluded.score_id,
+                score = excluded.score,
+                total_questions = excluded.total_questions,
+                percentage = excluded.percentage,
+                quiz_date = excluded.quiz_date
+            WHERE (excluded.percentage, excluded.score, excluded.quiz_date)
+                > (player_best.percentage, player_best.score, player_best.quiz_date)
+        ''', (score_id,))
+        
+        cursor.execute('''
+            INSERT INTO player_stats (player_id, attempts, total_score, total_questions,
+                                      percentage_sum, best_percentage, last_played)
+            SELECT player_id, 1, score, total_questions, percentage, percentage, quiz_date
+            FROM scores WHERE id = ? AND player_id IS NOT NULL
+            ON CONFLICT (player_id) DO UPDATE SET
+                attempts = attempts + 1,
+                total_score = total_score + excluded.total_score,
+                total_questions = total_questions + excluded.total_questions,
+                percentage_sum = percentage_sum + excluded.percentage_sum,
+                best_percentage = MAX(best_percentage, excluded.best_percentage),
+                last_played = MAX(last_played, excluded.last_played)
+        ''', (score_id,))
+        
+        cursor.execute(migrations.UPSERT_PERIOD_BEST_SQL, (score_id, score_id))
+        return score_id
+    
+    @instrumented
+    def get_leaderboard(self, limit=10, best_per_player=False):
+        """Get the top scores for the leaderboard
+        
+        With ``best_per_player`` each player appears once, with their best attempt.
+        """
+        table = 'player_best' if best_per_player else 'scores'
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT p.name, s.score, s.total_questions, s.quiz_date, s.percentage
+                FROM {table} s
+                JOIN players p ON s.player_id = p.id
+                ORDER BY s.percentage DESC, s.score DESC, s.quiz_date DESC
+                LIMIT ?
+            ''', (limit,))
+            return cursor.fetchall()
+    
+    @instrumented
+    def get_player_rank(self, player_name):
+        """Get a player's rank by best percentage: (rank, players ranked, percentile)
+        
+        Returns None for unknown players and players without a score. Backed
+        by an in-memory order-statistic index, so it does not sort or count
+        the scores table.
+        """
+        with self.connection() as conn:
+            row = conn.execute("SELECT id FROM players WHERE name = ?", (player_name,)).fetchone()
+        if row is None:
+            return None
+        return self.rank_index.rank(row[0])
+    
+    @instrumented
+    def get_period_leaderboard(self, period, limit=10, bucket=None):
+        """Get the best score of each player in one day, week or month
+        
+        ``bucket`` picks the period by its start: '2024-05-17' for a day, the
+        Monday for a week, '2024-05' for a month. The default is the current
+        one. Reads only the ``period_best`` rollup table.
+        """
+        if period not in migrations.PERIODS:
+            raise ValueError(f"Unknown leaderboard period: {period!r}")
+        current = migrations.PERIODS[period].format(ts='CURRENT_TIMESTAMP')
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT p.name, b.score, b.total_questions, b.quiz_date, b.percentage
+                FROM period_best b
+                JOIN players p ON b.player_id = p.id
+                WHERE b.period = ? AND b.bucket = COALESCE(?, {current})
+                ORDER BY b.percentage DESC, b.score DESC, b.quiz_date DESC
+                LIMIT ?
+            ''', (period, bucket, limit))
+            return cursor.fetchall()
+    
+    @instrumented
+    def backfill_period_leaderboards(self, batch_size=10000):
+        """Fold every existing score into the period leaderboards, in id batches
+        
+        Safe to run on a live database and to re-run: a score only replaces a
+        period entry it beats. Each batch is its own short transaction.
+        Returns the number of scores processed.
+        """
+        processed = 0
+        after = 0
+        while True:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT MIN(id), MAX(id), COUNT(*) FROM (
+                        SELECT id FROM scores WHERE id > ? ORDER BY id LIMIT ?
+                    )
+                ''', (after, batch_size))
+                first, last, count = cursor.fetchone()
+                if not count:
+                    return processed
+                cursor.execute(migrations.UPSERT_PERIOD_BEST_SQL, (first, last))
+            processed += count
+            after = last
+    
+    @instrumented
+    def rebuild_leaderboard(self):
+        """Recompute every stored percentage, the best-score tables and player stats"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            migrations.rebuild_leaderboard(cursor)
+            migrations.rebuild_player_stats(cursor)
+            migrations.rebuild_period_best(cursor)
+        self.rank_index.invalidate()
     
+    @instrumented
+    def check_leaderboard(self, limit=100):
+        """Compare the materialized leaderboard with the original full-scan query
+        
+        Returns a list of human-readable problems; an empty list means consistent.
+        """
+        problems = []
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT COUNT(*) FROM scores
+                WHERE percentage IS NOT ROUND((score * 100.0 / total_questions), 2)
+            ''')
+            stale = cursor.fetchone()[0]
+            if stale:
+                problems.append(f"{stale} scores have a missing or stale percentage")
+            
+            cursor.execute('''
+                SELECT ROUND((s.score * 100.0 / s.total_questions), 2) as percentage,
+                       s.score, s.quiz_date
+                FROM scores s
+                JOIN players p ON s.player_id = p.id
+                ORDER BY percentage DESC, s.score DESC, s.quiz_date DESC
+                LIMIT ?
+            ''', (limit,))
+            expected = cursor.fetchall()
+            actual = [(row[4], row[1], row[3]) for row in self.get_leaderboard(limit)]
+            if actual != expected:
+                problems.append("Top scores differ from the full-scan leaderboard query")
+            
+            cursor.execute('''
+                SELECT COUNT(*) FROM (
+                    SELECT player_id, MAX(ROUND((score * 100.0 / total_questions), 2)) AS best
+                    FROM scores WHERE player_id IS NOT NULL GROUP BY player_id
+                ) expected
+                LEFT JOIN player_best b ON b.player_id = expected.player_id
+                WHERE b.percentage IS NOT expected.best
+            ''')
+            wrong_best = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT COUNT(*) FROM player_best b
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM scores s WHERE s.id = b.score_id AND s.player_id = b.player_id
+                )
+            ''')
+            wrong_best += cursor.fetchone()[0]
+            if wrong_best:
+                problems.append(f"{wrong_best} players have a wrong best-score entry")
+            
+            cursor.execute('''
+                SELECT COUNT(*) FROM (
+                    SELECT player_id, COUNT(*) AS attempts, SUM(score) AS total_score,
+                           SUM(total_questions) AS total_questions,
+                           MAX(percentage) AS best_percentage, MAX(quiz_date) AS last_played
+                    FROM scores WHERE player_id IS NOT NULL GROUP BY player_id
+                ) expected
+                LEFT JOIN player_stats ps ON ps.player_id = expected.player_id
+                WHERE (ps.attempts, ps.total_score, ps.total_questions, ps.best_percentage, ps.last_played)
+                    IS NOT (expected.attempts, expected.total_score, expected.total_questions,
+                            expected.best_percentage, expected.last_played)
+            ''')
+            wrong_stats = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT COUNT(*) FROM player_stats ps
+                WHERE NOT EXISTS (SELECT 1 FROM scores s WHERE s.player_id = ps.player_id)
+            ''')
+            wrong_stats += cursor.fetchone()[0]
+            if wrong_stats:
+                problems.append(f"{wrong_stats} players have wrong running statistics")
+            
+            cursor.execute(f'''
+                SELECT COUNT(*) FROM (
+                    SELECT p.period, {migrations.period_bucket_sql('p.period', 's.quiz_date')} AS bucket,
+                           s.player_id, MAX(s.percentage) AS best
+                    FROM scores s, ({migrations.PERIOD_NAMES_SQL}) p
+                    WHERE s.player_id IS NOT NULL
+                    GROUP BY p.period, bucket, s.player_id
+                ) expected
+                LEFT JOIN period_best b
+                    ON (b.period, b.bucket, b.player_id) = (expected.period, expected.bucket, expected.player_id)
+                WHERE b.percentage IS NOT expected.best
+            ''')
+            wrong_periods = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT COUNT(*) FROM period_best b
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM scores s WHERE s.id = b.score_id AND s.player_id = b.player_id
+                )
+            ''')
+            wrong_periods += cursor.fetchone()[0]
+            if wrong_periods:
+                problems.append(f"{wrong_periods} daily, weekly or monthly entries are wrong")
+        return problems
+    
+    @instrumented
     def get_player_history(self, player_name):
         """Get a player's quiz history"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT s.score, s.total_questions, s.quiz_date, s.percentage
+                FROM scores s
+                WHERE s.player_id = (SELECT id FROM players WHERE name = ?)
+                ORDER BY s.quiz_date DESC, s.id DESC
+            ''', (player_name,))
+            return cursor.fetchall()
+    
+    @instrumented
+    def get_player_history_page(self, player_name, page_size=20, after=None):
+        """Get one page of a player's history, newest first
         
-        cursor.execute('''
-            SELECT s.score, s.total_questions, s.quiz_date,
-                   ROUND((s.score * 100.0 / s.total_questions), 2) as percentage
-            FROM scores s
-            JOIN players p ON s.player_id = p.id
-            WHERE p.name = ?
-            ORDER BY s.quiz_date DESC
-        ''', (player_name,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        return results
+        Returns ``(rows, next_cursor)``. Pass ``next_cursor`` back as ``after``
+        to fetch the following page; it is None on the last page. Each page is
+        a single index range seek, however long the history is.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            if after is None:
+                cursor.execute('''
+                    SELECT s.score, s.total_questions, s.quiz_date, s.percentage, s.id
+                    FROM scores s
+                    WHERE s.player_id = (SELECT id FROM players WHERE name = ?)
+                    ORDER BY s.quiz_date DESC, s.id DESC
+                    LIMIT ?
+                ''', (player_name, page_size + 1))
+            else:
+                cursor.execute('''
+                    SELECT s.score, s.total_questions, s.quiz_date, s.percentage, s.id
+                    FROM scores s
+                    WHERE s.player_id = (SELECT id FROM players WHERE name = ?)
+                      AND (s.quiz_date, s.id) < (?, ?)
+                    ORDER BY s.quiz_date DESC, s.id DESC
+                    LIMIT ?
+                ''', (player_name, after[0], after[1], page_size + 1))
+            rows = cursor.fetchall()
+        
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = (rows[-1][2], rows[-1][4])
+        return [row[:4] for row in rows], next_cursor
+    
+    @instrumented
+    def get_player_stats(self, player_name):
+        """Get a player's running totals without reading their history
+        
+        Returns ``(attempts, average percentage, best score, best total,
+        best percentage, last played)`` or None if the player has no scores.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT ps.attempts, ROUND(ps.percentage_sum / ps.attempts, 2),
+                       b.score, b.total_questions, ps.best_percentage, ps.last_played
+                FROM players p
+                JOIN player_stats ps ON ps.player_id = p.id
+                JOIN player_best b ON b.player_id = p.id
+                WHERE p.name = ?
+            ''', (player_name,))
+            return cursor.fetchone()
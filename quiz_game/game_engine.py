@@ -1,5 +1,5 @@
-from database import Database
-from models import Question, Player, Quiz
+from models import Player
+from session import SessionManager
 import os
 import time
 import sys
@@ -12,20 +12,87 @@ if sys.platform == "win32":
     except:
         pass
 
+# Quiz history rows shown per page
+HISTORY_PAGE_SIZE = 20
+
+# Leaderboard menu: choice -> (title, period passed to get_period_leaderboard)
+LEADERBOARD_PERIODS = {
+    '1': ("ALL TIME", None),
+    '2': ("TODAY", 'day'),
+    '3': ("THIS WEEK", 'week'),
+    '4': ("THIS MONTH", 'month'),
+}
+
+def top_share(rank, players):
+    """'top 12%' style text for a rank, with more digits near the top"""
+    share = rank * 100.0 / players
+    if share >= 10:
+        return f"top {share:.0f}%"
+    if share >= 1:
+        return f"top {share:.1f}%".replace(".0%", "%")
+    return f"top {share:.2g}%"
+
 class QuizGameEngine:
     """Main game engine that manages the quiz game flow"""
     
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, write_behind=False, adaptive=False, answer_log=False, pack=None):
+        # Nothing is opened here: sqlite3 and the database modules are only
+        # imported, and the pool set up, once the first query needs them, so
+        # the name prompt appears without waiting for them
+        self._options = (write_behind, adaptive, answer_log, pack)
+        self._db = None
+        self._sessions = None
+        self.score_writer = None
+        self.selector = None
+        self.answer_log = None
         self.current_player = None
         self.current_quiz = None
-        
-        # Initialize database with sample questions
-        self.db.add_sample_questions()
+    
+    @property
+    def db(self):
+        """The game database, opened with the optional features on first use"""
+        if self._db is None:
+            self._open(*self._options)
+        return self._db
+    
+    @property
+    def sessions(self):
+        """SessionManager over ``db``"""
+        if self._sessions is None:
+            self._open(*self._options)
+        return self._sessions
+    
+    def _open(self, write_behind, adaptive, answer_log, pack):
+        from sharding import open_database
+        self._db = open_database()
+        if write_behind:
+            # Write-behind queue that batches score inserts
+            from write_behind import ScoreWriter
+            self.score_writer = ScoreWriter(self._db)
+        if adaptive:
+            # Selector that matches questions to the player's accuracy
+            from adaptive import AdaptiveSelector
+            self.selector = AdaptiveSelector(self._db)
+        if answer_log:
+            # Per-answer event log, written in batches
+            from answer_log import AnswerLogger
+            self.answer_log = AnswerLogger(self._db)
+        if pack:
+            # Memory-mapped quiz pack that every quiz is drawn from
+            from quiz_pack import open_pack
+            pack = open_pack(pack)
+        # Finished sessions save their score through the queue when write-behind is on
+        save_score = self.score_writer.save_score if self.score_writer else None
+        self._sessions = SessionManager(self._db, save_score=save_score, selector=self.selector,
+                                        answer_log=self.answer_log, pack=pack)
     
     def clear_screen(self):
         """Clear the console screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if os.name == 'nt':
+            os.system('cls')
+        else:
+            # The escape codes `clear` prints, without spawning a process for it
+            print("\033[H\033[2J\033[3J", end="", flush=True)
     
     def display_welcome(self):
         """Display welcome message"""
@@ -47,29 +114,13 @@ class QuizGameEngine:
     
     def create_quiz(self, num_questions=5):
         """Create a new quiz with random questions"""
-        questions_data = self.db.get_random_questions(num_questions)
+        quiz = self.sessions.create_quiz(num_questions, player=self.current_player)
         
-        if not questions_data:
+        if quiz is None:
             print("No questions available in the database!")
             return False
         
-        questions = []
-        for q_data in questions_data:
-            question = Question(
-                question_id=q_data[0],
-                text=q_data[1],
-                option_a=q_data[2],
-                option_b=q_data[3],
-                option_c=q_data[4],
-                option_d=q_data[5],
-                correct_answer=q_data[6],
-                category=q_data[7],
-                difficulty=q_data[8]
-            )
-            questions.append(question)
-        
-        self.current_quiz = Quiz(questions)
-        self.current_quiz.shuffle_questions()
+        self.current_quiz = quiz
         return True
     
     def play_quiz(self):
@@ -78,18 +129,15 @@ class QuizGameEngine:
             print("No quiz available!")
             return
         
-        self.current_player.reset_score()
-        self.current_quiz.start_quiz()
+        session = self.sessions.start_session(self.current_player, quiz=self.current_quiz)
         
         print(f"\n*** Starting Quiz for {self.current_player.name}! ***")
         print(f"*** {len(self.current_quiz.questions)} questions await you! ***\n")
         
-        question_number = 1
-        
-        while self.current_quiz.has_next_question():
-            current_question = self.current_quiz.get_current_question()
+        while not session.is_finished:
+            current_question = session.current_question
             
-            print(f"Question {question_number}/{len(self.current_quiz.questions)}")
+            print(f"Question {session.question_number}/{len(self.current_quiz.questions)}")
             print(f"Category: {current_question.category} | Difficulty: {current_question.difficulty}")
             print("-" * 50)
             print(f"{current_question.text}")
@@ -98,6 +146,7 @@ class QuizGameEngine:
             print()
             
             # Get player's answer
+            session.mark_presented()
             while True:
                 answer = input("Your answer (A/B/C/D): ").strip().upper()
                 if answer in ['A', 'B', 'C', 'D']:
@@ -105,41 +154,33 @@ class QuizGameEngine:
                 print("Please enter A, B, C, or D!")
             
             # Process the answer
-            is_correct = self.current_quiz.answer_current_question(self.current_player, answer)
+            result = session.submit_answer(answer)
             
-            if is_correct:
+            if result.is_correct:
                 print("*** CORRECT! Well done! ***")
             else:
-                correct_option = current_question.correct_answer
-                correct_text = current_question.options[correct_option]
-                print(f"*** INCORRECT! The correct answer was {correct_option}: {correct_text} ***")
+                print(f"*** INCORRECT! The correct answer was {result.correct_answer}: {result.correct_text} ***")
             
-            print(f"Current Score: {self.current_player.current_score}/{self.current_player.total_questions_answered}")
+            print(f"Current Score: {result.score}/{result.answered}")
             
-            if self.current_quiz.has_next_question():
+            if not result.finished:
                 input("\nPress Enter to continue...")
                 self.clear_screen()
-            
-            question_number += 1
         
-        # Quiz completed
-        self.show_quiz_results()
-        self.save_quiz_results()
+        # Quiz completed: the session manager scores and saves it
+        result = self.sessions.finish(session.id)
+        self.show_quiz_results(result)
     
-    def show_quiz_results(self):
-        """Display quiz results"""
+    def show_quiz_results(self, result):
+        """Display a finished session's SessionResult"""
         print("\n" + "=" * 50)
         print("*** QUIZ COMPLETED! ***")
         print("=" * 50)
         
-        score = self.current_player.current_score
-        total = self.current_player.total_questions_answered
-        percentage = self.current_player.get_percentage()
-        duration = self.current_quiz.get_duration()
-        
-        print(f"Player: {self.current_player.name}")
-        print(f"Final Score: {score}/{total} ({percentage}%)")
-        print(f"Time Taken: {duration:.1f} seconds")
+        percentage = result.percentage
+        print(f"Player: {result.player_name}")
+        print(f"Final Score: {result.score}/{result.total_questions} ({percentage}%)")
+        print(f"Time Taken: {result.duration:.1f} seconds")
         
         # Performance feedback
         if percentage >= 90:
@@ -150,23 +191,31 @@ class QuizGameEngine:
             print("*** Not bad! Keep practicing! ***")
         else:
             print("*** Keep studying and try again! ***")
+        
+        if result.saved:
+            print("\n*** Your score has been saved! ***")
     
-    def save_quiz_results(self):
-        """Save the quiz results to database"""
-        self.db.save_score(
-            self.current_player.id,
-            self.current_player.current_score,
-            self.current_player.total_questions_answered
-        )
-        print("\n*** Your score has been saved! ***")
+    def choose_leaderboard_period(self):
+        """Ask which leaderboard to show; returns a LEADERBOARD_PERIODS key"""
+        print("\n1. All Time   2. Today   3. This Week   4. This Month")
+        while True:
+            choice = input("Choose a leaderboard (1-4, default 1): ").strip() or '1'
+            if choice in LEADERBOARD_PERIODS:
+                return choice
+            print("Please enter 1, 2, 3 or 4!")
     
-    def show_leaderboard(self):
-        """Display the leaderboard"""
+    def show_leaderboard(self, choice='1'):
+        """Display the all-time leaderboard, or the best players of the current day, week or month"""
+        title, period = LEADERBOARD_PERIODS[choice]
         print("\n" + "=" * 60)
-        print("*** LEADERBOARD - TOP PERFORMERS ***")
+        print(f"*** LEADERBOARD - TOP PERFORMERS ({title}) ***")
         print("=" * 60)
         
-        leaderboard = self.db.get_leaderboard(10)
+        self.flush_scores()
+        if period is None:
+            leaderboard = self.db.get_leaderboard(10)
+        else:
+            leaderboard = self.db.get_period_leaderboard(period, 10)
         
         if not leaderboard:
             print("No scores recorded yet. Be the first to play!")
@@ -190,6 +239,18 @@ class QuizGameEngine:
                 rank = f"  {i}  "
             
             print(f"{rank:<5} {name:<15} {score}/{total:<6} {percentage}%{'':<7} {formatted_date}")
+        
+        if period is None:
+            self.show_player_rank()
+    
+    def show_player_rank(self):
+        """Print where the current player's best score ranks among all players"""
+        if not self.current_player:
+            return
+        standing = self.db.get_player_rank(self.current_player.name)
+        if standing:
+            rank, players, _ = standing
+            print(f"\nYour best ranks #{rank:,} of {players:,} players ({top_share(rank, players)})")
     
     def show_player_history(self):
         """Show current player's quiz history"""
@@ -200,28 +261,39 @@ class QuizGameEngine:
         print(f"\n*** Quiz History for {self.current_player.name} ***")
         print("=" * 50)
         
-        history = self.db.get_player_history(self.current_player.name)
+        self.flush_scores()
+        stats = self.db.get_player_stats(self.current_player.name)
         
-        if not history:
+        if not stats:
             print("No quiz history found. Play your first quiz!")
             return
         
         print(f"{'Quiz #':<8} {'Score':<10} {'Percentage':<12} {'Date':<20}")
         print("-" * 50)
         
-        for i, (score, total, date, percentage) in enumerate(history, 1):
-            formatted_date = date[:16] if len(date) > 16 else date
-            print(f"{i:<8} {score}/{total:<6} {percentage}%{'':<7} {formatted_date}")
+        quiz_number = 0
+        cursor = None
+        while True:
+            history, cursor = self.db.get_player_history_page(
+                self.current_player.name, HISTORY_PAGE_SIZE, after=cursor)
+            for score, total, date, percentage in history:
+                quiz_number += 1
+                formatted_date = date[:16] if len(date) > 16 else date
+                print(f"{quiz_number:<8} {score}/{total:<6} {percentage}%{'':<7} {formatted_date}")
+            if cursor is None:
+                break
+            more = input(f"-- {quiz_number} of {stats[0]} shown. Press Enter for more, or 'q' to stop: ")
+            if more.strip().lower() == 'q':
+                break
         
-        # Calculate statistics
-        total_quizzes = len(history)
-        avg_percentage = sum(h[3] for h in history) / total_quizzes
-        best_score = max(history, key=lambda x: x[3])
+        total_quizzes, avg_percentage, best_score, best_total, best_percentage, last_played = stats
         
         print(f"\n*** Statistics: ***")
         print(f"Total Quizzes: {total_quizzes}")
         print(f"Average Score: {avg_percentage:.1f}%")
-        print(f"Best Performance: {best_score[0]}/{best_score[1]} ({best_score[3]}%)")
+        print(f"Best Performance: {best_score}/{best_total} ({best_percentage}%)")
+        print(f"Last Played: {last_played[:16]}")
+        self.show_player_rank()
     
     def add_custom_question(self):
         """Allow adding custom questions to the database"""
@@ -259,7 +331,12 @@ class QuizGameEngine:
             print("Please enter Easy, Medium, or Hard!")
         
         # Add to database
-        self.db.add_question(text, option_a, option_b, option_c, option_d, correct, category, difficulty)
+        from database import DuplicateQuestionError
+        try:
+            self.db.add_question(text, option_a, option_b, option_c, option_d, correct, category, difficulty)
+        except DuplicateQuestionError:
+            print("\nThat question is already in the database!")
+            return
         print("\n*** Question added successfully! ***")
     
     def show_main_menu(self):
@@ -297,7 +374,7 @@ class QuizGameEngine:
                     self.clear_screen()
             
             elif choice == '3':
-                self.show_leaderboard()
+                self.show_leaderboard(self.choose_leaderboard_period())
                 input("\nPress Enter to return to menu...")
                 self.clear_screen()
             
@@ -322,6 +399,23 @@ class QuizGameEngine:
             else:
                 print("Invalid choice! Please enter 1-7.")
     
+    def flush_scores(self):
+        """Write any queued scores so reads see them"""
+        if self.score_writer:
+            self.score_writer.flush()
+    
+    def close(self):
+        """Flush pending scores and release database connections"""
+        if self._db is None:
+            return
+        if self.score_writer:
+            self.score_writer.close()
+        if self.selector:
+            self.selector.close()
+        if self.answer_log:
+            self.answer_log.close()
+        self._db.close()
+    
     def run(self):
         """Start the quiz game"""
         self.clear_screen()
@@ -0,0 +1,259 @@
+import functools
+import sqlite3
+import threading
+import time
+
+# Upper bounds of the latency buckets, in milliseconds
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float('inf'))
+
+# SQLite calls the progress handler every this many VM instructions
+PROGRESS_STEPS = 1000
+
+# Compiled on first use, so importing this module does not pull in re
+_IN_LIST = None
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and IN (?, ?, ...) lists so similar statements group together"""
+    global _IN_LIST
+    if _IN_LIST is None:
+        import re
+        _IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+    sql = " ".join(sql.split())
+    return _IN_LIST.sub("(?...)", sql)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with count, total, min and max"""
+
+    __slots__ = ('counts', 'count', 'total_ms', 'min_ms', 'max_ms', 'rows')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float('inf')
+        self.max_ms = 0.0
+        self.rows = 0
+
+    def record(self, elapsed_ms, rows=0):
+        for index, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.min_ms = min(self.min_ms, elapsed_ms)
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+
+    def add_fetch(self, elapsed_ms, rows):
+        """Add fetch time and rows to the statement's last execution"""
+        self.total_ms += elapsed_ms
+        self.rows += rows
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        target = pct / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'rows': self.rows,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 4) if self.count else 0.0,
+            'min_ms': round(self.min_ms, 4) if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99),
+            'max_ms': round(self.max_ms, 4),
+            'buckets': {str(bound): count for bound, count in zip(BUCKETS_MS, self.counts) if count},
+        }
+
+
+class Instrumentation:
+    """Collects per-method and per-statement latency for one database
+
+    Statements are timed by the cursor wrapper below; SQLite's trace callback
+    counts everything the library actually runs (including implicit BEGIN and
+    COMMIT), and the progress handler counts VM work in steps of
+    PROGRESS_STEPS instructions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.methods = {}
+            self.statements = {}
+            self.traced = {}
+            self.connection_open = LatencyHistogram()
+            self.vm_steps = 0
+            self.started = time.time()
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = LatencyHistogram()
+        return histogram
+
+    def record_method(self, name, elapsed_ms):
+        with self._lock:
+            self._histogram(self.methods, name).record(elapsed_ms)
+
+    def record_statement(self, sql, elapsed_ms, rows=0):
+        key = normalize_sql(sql)
+        with self._lock:
+            self._histogram(self.statements, key).record(elapsed_ms, rows)
+
+    def record_fetch(self, sql, elapsed_ms, rows):
+        key = normalize_sql(sql)
+        with self._lock:
+            self._histogram(self.statements, key).add_fetch(elapsed_ms, rows)
+
+    def record_connection_open(self, elapsed_ms):
+        with self._lock:
+            self.connection_open.record(elapsed_ms)
+
+    def trace(self, statement):
+        """sqlite3 trace callback: count statements by leading keyword"""
+        keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else '?'
+        with self._lock:
+            self.traced[keyword] = self.traced.get(keyword, 0) + 1
+
+    def progress(self):
+        """sqlite3 progress handler; returning 0 lets the statement continue"""
+        self.vm_steps += PROGRESS_STEPS
+        return 0
+
+    def attach(self, conn):
+        """Install the trace and progress callbacks on a connection"""
+        conn.instrumentation = self
+        conn.set_trace_callback(self.trace)
+        conn.set_progress_handler(self.progress, PROGRESS_STEPS)
+
+    def snapshot(self):
+        """Return all collected stats as plain data"""
+        with self._lock:
+            return {
+                'since': self.started,
+                'methods': {name: h.to_dict() for name, h in sorted(self.methods.items())},
+                'statements': {sql: h.to_dict() for sql, h in
+                               sorted(self.statements.items(), key=lambda item: -item[1].total_ms)},
+                'connection_open': self.connection_open.to_dict(),
+                'traced_statements': dict(sorted(self.traced.items())),
+                'vm_steps': self.vm_steps,
+            }
+
+    def dump(self, path):
+        """Write a snapshot as JSON"""
+        import json
+
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+def format_report(snapshot, top=10):
+    """Render a snapshot as a text report"""
+    lines = ["Database methods:"]
+    lines.append(f"   {'Method':<26} {'Calls':>7} {'Mean ms':>9} {'p99 ms':>8} {'Max ms':>8}")
+    for name, stats in snapshot['methods'].items():
+        lines.append(f"   {name:<26} {stats['count']:>7} {stats['mean_ms']:>9.3f} "
+                     f"{stats['p99_ms']:>8.2f} {stats['max_ms']:>8.2f}")
+
+    lines.append(f"\nTop {top} statements by total time:")
+    for sql, stats in list(snapshot['statements'].items())[:top]:
+        lines.append(f"   {stats['total_ms']:>9.2f} ms  {stats['count']:>6}x  {stats['rows']:>8} rows  {sql[:90]}")
+
+    opened = snapshot['connection_open']
+    lines.append(f"\nConnections opened: {opened['count']} (mean {opened['mean_ms']:.3f} ms)")
+    traced = ", ".join(f"{keyword} {count}" for keyword, count in snapshot['traced_statements'].items())
+    lines.append(f"Statements run by SQLite: {traced or 'none'}")
+    lines.append(f"VM steps: ~{snapshot['vm_steps']:,}")
+    return "\n".join(lines)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times each statement and counts the rows it touches"""
+
+    def _timed(self, method, sql, *args):
+        instrumentation = self.connection.instrumentation
+        started = time.perf_counter()
+        result = method(sql, *args)
+        rows = self.rowcount if self.rowcount > 0 else 0
+        instrumentation.record_statement(sql, (time.perf_counter() - started) * 1000, rows)
+        self._sql = sql
+        return result
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def _fetched(self, rows, elapsed):
+        sql = getattr(self, '_sql', None)
+        if sql is not None:
+            self.connection.instrumentation.record_fetch(sql, elapsed * 1000, rows)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(1 if row is not None else 0, time.perf_counter() - started)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), time.perf_counter() - started)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), time.perf_counter() - started)
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are instrumented"""
+
+    instrumentation = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def instrumented(method):
+    """Time a Database method when instrumentation is enabled
+
+    When it is disabled the only cost is one attribute lookup per call.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = self.pool.instrumentation
+        if instrumentation is None:
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            instrumentation.record_method(name, (time.perf_counter() - started) * 1000)
+    return wrapper
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Leaderboard maintenance for the Quiz Game
+Rebuilds the materialized leaderboard or checks it against the full-scan query.
+
+Usage:
+    python leaderboard_tool.py rebuild
+    python leaderboard_tool.py check [--limit 100]
+    python leaderboard_tool.py backfill [--batch-size 10000]
+
+backfill folds existing scores into the daily, weekly and monthly
+leaderboards in short batches, so it can run while the game is being played.
+"""
+
+import argparse
+import sys
+
+from database import Database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['rebuild', 'check', 'backfill'])
+    parser.add_argument('--limit', type=int, default=100, help="top-N rows compared by 'check'")
+    parser.add_argument('--batch-size', type=int, default=10000, help="scores per 'backfill' transaction")
+    args = parser.parse_args()
+
+    db = Database()
+    try:
+        if args.command == 'rebuild':
+            db.rebuild_leaderboard()
+            print("Leaderboard rebuilt.")
+            return 0
+        if args.command == 'backfill':
+            count = db.backfill_period_leaderboards(args.batch_size)
+            print(f"Backfilled period leaderboards from {count} scores.")
+            return 0
+
+        problems = db.check_leaderboard(args.limit)
+        if not problems:
+            print("Leaderboard is consistent.")
+            return 0
+        for problem in problems:
+            print(f"  • {problem}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Load generator for the Quiz Game server
+Opens many concurrent bot connections, plays quizzes through the line
+protocol and reports answer latency percentiles and sessions per second.
+
+Usage:
+    python load_client.py [--clients 100] [--sessions 5] [--questions 5] [--port 8765]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from metrics import summarize
+
+
+class LoadStats:
+    def __init__(self):
+        self.answer_latencies = []
+        self.sessions = 0
+        self.errors = 0
+
+
+async def expect(reader, prefix):
+    """Read lines until one starts with ``prefix``; fail on ERROR"""
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection")
+        line = line.decode('utf-8').rstrip("\n")
+        if line.startswith("ERROR"):
+            raise RuntimeError(line)
+        if line.startswith(prefix):
+            return line.split("\t")
+
+
+async def bot(bot_id, args, stats):
+    """One simulated player: connect, register, play a few quizzes, quit"""
+    try:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    except OSError:
+        stats.errors += 1
+        return
+
+    async def send(line):
+        writer.write(line.encode('utf-8') + b"\n")
+        await writer.drain()
+
+    try:
+        await expect(reader, "MENU")
+        await send(f"NAME bot-{bot_id}")
+        await expect(reader, "OK")
+
+        for _ in range(args.sessions):
+            await send(f"PLAY {args.questions}")
+            fields = await expect(reader, "QUESTION")
+            while True:
+                await asyncio.sleep(args.think_time * random.random())
+                started = time.perf_counter()
+                await send(f"ANSWER {random.choice('ABCD')}")
+                await expect(reader, "RESULT")
+                stats.answer_latencies.append((time.perf_counter() - started) * 1000)
+
+                fields = await expect(reader, "")
+                if fields[0] == "FINISHED":
+                    stats.sessions += 1
+                    break
+                if fields[0] != "QUESTION":
+                    raise RuntimeError(f"Unexpected reply {fields!r}")
+
+        await send("QUIT")
+        await expect(reader, "BYE")
+    except (ConnectionError, RuntimeError, asyncio.IncompleteReadError) as e:
+        stats.errors += 1
+        if args.verbose:
+            print(f"bot-{bot_id}: {e}")
+    finally:
+        writer.close()
+
+
+async def run(args):
+    stats = LoadStats()
+    started = time.perf_counter()
+    await asyncio.gather(*(bot(i, args, stats) for i in range(args.clients)))
+    elapsed = time.perf_counter() - started
+
+    latency = summarize(stats.answer_latencies)
+    print(f"Clients: {args.clients}  Sessions: {stats.sessions}  Errors: {stats.errors}  "
+          f"Elapsed: {elapsed:.2f}s")
+    print(f"Sessions/sec: {stats.sessions / elapsed:.1f}")
+    print(f"Answer latency (ms): p50 {latency['p50']:.2f}  p90 {latency['p90']:.2f}  "
+          f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}  ({latency['count']} answers)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--clients', type=int, default=100, help="concurrent connections")
+    parser.add_argument('--sessions', type=int, default=5, help="quizzes played per client")
+    parser.add_argument('--questions', type=int, default=5, help="questions per quiz")
+    parser.add_argument('--think-time', type=float, default=0.0, help="max random delay before answering (s)")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
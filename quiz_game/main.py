@@ -26,14 +26,24 @@ from game_engine import QuizGameEngine
 
 def main():
     """Main entry point for the quiz game"""
+    game = None
     try:
-        game = QuizGameEngine()
+        game = QuizGameEngine(
+            write_behind=os.environ.get('QUIZ_GAME_WRITE_BEHIND') == '1',
+            adaptive=os.environ.get('QUIZ_GAME_ADAPTIVE') == '1',
+            answer_log=os.environ.get('QUIZ_GAME_ANSWER_LOG') == '1',
+            pack=os.environ.get('QUIZ_GAME_PACK'),
+        )
         game.run()
     except KeyboardInterrupt:
         print("\n\nGame interrupted. Thanks for playing!")
     except Exception as e:
         print(f"\nAn error occurred: {e}")
         print("Please check your setup and try again.")
+    finally:
+        # Runs on KeyboardInterrupt too, so queued scores are never lost
+        if game is not None:
+            game.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,28 @@
+"""
+Small helpers for latency statistics shared by the server tools and benchmarks
+"""
+
+import math
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(values):
+    """Return count/mean/p50/p90/p99/max for a list of numbers"""
+    ordered = sorted(values)
+    if not ordered:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': percentile(ordered, 50),
+        'p90': percentile(ordered, 90),
+        'p99': percentile(ordered, 99),
+        'max': ordered[-1],
+    }
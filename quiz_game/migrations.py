@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Schema migrations for the Quiz Game database
+Each migration runs once, in order, and the schema version is stored in
+PRAGMA user_version so existing quiz_game.db files upgrade in place.
+
+Usage:
+    python migrations.py            # upgrade the default database
+    python migrations.py --status   # show the current and latest version
+"""
+
+from question_search import SEARCH_COLUMNS, question_text_hash
+
+# Seeded into new databases by migration 9
+SAMPLE_QUESTIONS = [
+    ("What is the capital of France?", "London", "Berlin", "Paris", "Madrid", "C", "Geography", "Easy"),
+    ("Which planet is known as the Red Planet?", "Venus", "Mars", "Jupiter", "Saturn", "B", "Science", "Easy"),
+    ("What is 2 + 2?", "3", "4", "5", "6", "B", "Math", "Easy"),
+    ("Who wrote 'Romeo and Juliet'?", "Charles Dickens", "William Shakespeare", "Jane Austen", "Mark Twain", "B", "Literature", "Medium"),
+    ("What is the largest mammal in the world?", "Elephant", "Blue Whale", "Giraffe", "Hippopotamus", "B", "Science", "Medium"),
+    ("In which year did World War II end?", "1944", "1945", "1946", "1947", "B", "History", "Medium"),
+    ("What is the chemical symbol for gold?", "Go", "Gd", "Au", "Ag", "C", "Science", "Hard"),
+    ("Which programming language is known for its use in web development?", "C++", "Java", "JavaScript", "Assembly", "C", "Technology", "Medium"),
+    ("What is the square root of 144?", "11", "12", "13", "14", "B", "Math", "Easy"),
+    ("Who painted the Mona Lisa?", "Vincent van Gogh", "Pablo Picasso", "Leonardo da Vinci", "Michelangelo", "C", "Art", "Medium"),
+]
+
+# Leaderboard periods: name -> SQLite expression for the bucket a timestamp falls in
+PERIODS = {
+    'day': "date({ts})",
+    'week': "date({ts}, 'weekday 0', '-6 days')",  # the Monday that starts the week
+    'month': "strftime('%Y-%m', {ts})",
+}
+
+
+def period_bucket_sql(period, ts):
+    """SQL expression for the bucket of timestamp ``ts`` in the period named by ``period``"""
+    cases = " ".join(f"WHEN '{name}' THEN {expr.format(ts=ts)}" for name, expr in PERIODS.items())
+    return f"CASE {period} {cases} END"
+
+
+# One row per period, to fan each score out into all of its buckets
+PERIOD_NAMES_SQL = " UNION ALL ".join(f"SELECT '{name}' AS period" for name in PERIODS)
+
+# Fold the scores with ids in [?, ?] into each player's best per period bucket
+UPSERT_PERIOD_BEST_SQL = f'''
+    INSERT INTO period_best (period, bucket, player_id, score_id, score, total_questions, percentage, quiz_date)
+    SELECT p.period, {period_bucket_sql('p.period', 's.quiz_date')}, s.player_id, s.id,
+           s.score, s.total_questions, s.percentage, s.quiz_date
+    FROM scores s, ({PERIOD_NAMES_SQL}) p
+    WHERE s.id BETWEEN ? AND ? AND s.player_id IS NOT NULL
+    ORDER BY s.id
+    ON CONFLICT (period, bucket, player_id) DO UPDATE SET
+        score_id = excluded.score_id,
+        score = excluded.score,
+        total_questions = excluded.total_questions,
+        percentage = excluded.percentage,
+        quiz_date = excluded.quiz_date
+    WHERE (excluded.percentage, excluded.score, excluded.quiz_date)
+        > (period_best.percentage, period_best.score, period_best.quiz_date)
+'''
+
+_FTS_COLUMNS = ", ".join(SEARCH_COLUMNS)
+_FTS_NEW = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+_FTS_OLD = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+
+FTS_INSERT_TRIGGER_SQL = f'''
+    CREATE TRIGGER IF NOT EXISTS questions_fts_insert AFTER INSERT ON questions BEGIN
+        INSERT INTO questions_fts (rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW});
+    END
+'''
+
+# Index every question past an id in one statement, for bulk inserts made
+# with the insert trigger dropped
+FTS_INDEX_NEW_QUESTIONS_SQL = f'''
+    INSERT INTO questions_fts (rowid, {_FTS_COLUMNS})
+    SELECT id, {_FTS_COLUMNS} FROM questions WHERE id > ?
+'''
+
+
+def _v1_base_tables(cursor):
+    """Create the original questions, players and scores tables"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL,
+            option_a TEXT NOT NULL,
+            option_b TEXT NOT NULL,
+            option_c TEXT NOT NULL,
+            option_d TEXT NOT NULL,
+            correct_answer TEXT NOT NULL,
+            category TEXT DEFAULT 'General',
+            difficulty TEXT DEFAULT 'Medium'
+        )
+    ''')
+    _v1_player_tables(cursor)
+
+
+def _v1_player_tables(cursor):
+    """Create the original players and scores tables"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS players (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_id INTEGER,
+            score INTEGER NOT NULL,
+            total_questions INTEGER NOT NULL,
+            quiz_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (player_id) REFERENCES players(id)
+        )
+    ''')
+
+
+def _v2_question_indexes(cursor):
+    """Index the category/difficulty filters used by the question sampler"""
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_questions_category_difficulty
+        ON questions (category, difficulty)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_questions_difficulty
+        ON questions (difficulty)
+    ''')
+
+
+def _v3_materialized_leaderboard(cursor):
+    """Store each score's percentage and keep a per-player best table"""
+    if 'percentage' not in table_columns(cursor, 'scores'):
+        cursor.execute("ALTER TABLE scores ADD COLUMN percentage REAL")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_best (
+            player_id INTEGER PRIMARY KEY,
+            score_id INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            total_questions INTEGER NOT NULL,
+            percentage REAL NOT NULL,
+            quiz_date TIMESTAMP NOT NULL,
+            FOREIGN KEY (player_id) REFERENCES players(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_scores_leaderboard
+        ON scores (percentage DESC, score DESC, quiz_date DESC)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_player_best_leaderboard
+        ON player_best (percentage DESC, score DESC, quiz_date DESC)
+    ''')
+    rebuild_leaderboard(cursor)
+
+
+def _v4_history_index(cursor):
+    """Covering index for a player's history, newest first"""
+    # id right after quiz_date so (quiz_date, id) keyset pages come out of
+    # the index already sorted
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_scores_player_history
+        ON scores (player_id, quiz_date, id, score, total_questions, percentage)
+    ''')
+
+
+def _v5_question_text_hash(cursor):
+    """Indexed normalized-text hash so imports can skip questions that already exist"""
+    if 'text_hash' not in table_columns(cursor, 'questions'):
+        cursor.execute("ALTER TABLE questions ADD COLUMN text_hash INTEGER")
+    cursor.connection.create_function('question_text_hash', 1, question_text_hash)
+    cursor.execute("UPDATE questions SET text_hash = question_text_hash(text) WHERE text_hash IS NULL")
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_questions_text_hash
+        ON questions (text_hash)
+    ''')
+
+
+def _v6_player_stats(cursor):
+    """Per-player running totals"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_stats (
+            player_id INTEGER PRIMARY KEY,
+            attempts INTEGER NOT NULL,
+            total_score INTEGER NOT NULL,
+            total_questions INTEGER NOT NULL,
+            percentage_sum REAL NOT NULL,
+            best_percentage REAL NOT NULL,
+            last_played TIMESTAMP NOT NULL,
+            FOREIGN KEY (player_id) REFERENCES players(id)
+        )
+    ''')
+    rebuild_player_stats(cursor)
+
+
+def _v7_question_stats(cursor):
+    """How often each question has been served and answered correctly"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS question_stats (
+            question_id INTEGER PRIMARY KEY,
+            times_served INTEGER NOT NULL DEFAULT 0,
+            times_correct INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (question_id) REFERENCES questions(id)
+        )
+    ''')
+
+
+def _v8_answer_log(cursor):
+    """Append-only answer events, their per-question rollup and its watermark"""
+    # No secondary indexes: inserts stay appends and the rollup reads id ranges
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS answers (
+            id INTEGER PRIMARY KEY,
+            player_id INTEGER,
+            question_id INTEGER NOT NULL,
+            chosen TEXT NOT NULL,
+            is_correct INTEGER NOT NULL,
+            response_ms INTEGER,
+            answered_at TIMESTAMP NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS question_answer_stats (
+            question_id INTEGER PRIMARY KEY,
+            answers INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            total_response_ms INTEGER NOT NULL,
+            chose_a INTEGER NOT NULL,
+            chose_b INTEGER NOT NULL,
+            chose_c INTEGER NOT NULL,
+            chose_d INTEGER NOT NULL,
+            FOREIGN KEY (question_id) REFERENCES questions(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rollup_watermarks (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+    ''')
+
+
+def _v9_sample_questions(cursor):
+    """Seed the sample questions into an empty question bank, once per database"""
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM questions)")
+    if cursor.fetchone()[0]:
+        return
+    cursor.executemany('''
+        INSERT INTO questions (text, option_a, option_b, option_c, option_d, correct_answer, category, difficulty,
+                               text_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(*row, question_text_hash(row[0])) for row in SAMPLE_QUESTIONS])
+
+
+def _v10_period_leaderboards(cursor):
+    """Each player's best score per day, week and month, backfilled from scores"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS period_best (
+            period TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            player_id INTEGER NOT NULL,
+            score_id INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            total_questions INTEGER NOT NULL,
+            percentage REAL NOT NULL,
+            quiz_date TIMESTAMP NOT NULL,
+            PRIMARY KEY (period, bucket, player_id),
+            FOREIGN KEY (player_id) REFERENCES players(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_period_best_leaderboard
+        ON period_best (period, bucket, percentage DESC, score DESC, quiz_date DESC)
+    ''')
+    rebuild_period_best(cursor)
+
+
+def _v11_player_best_score_index(cursor):
+    """Index new best scores by score id so the rank index can catch up incrementally"""
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_player_best_score
+        ON player_best (score_id)
+    ''')
+
+
+def _v12_question_search(cursor):
+    """FTS5 index over question text and options"""
+    if not fts5_available(cursor):
+        return
+    # External content: the index stores only tokens and reads text from questions
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts
+        USING fts5({_FTS_COLUMNS}, content='questions', content_rowid='id')
+    ''')
+    cursor.execute(FTS_INSERT_TRIGGER_SQL)
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS questions_fts_delete AFTER DELETE ON questions BEGIN
+            INSERT INTO questions_fts (questions_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', old.id, {_FTS_OLD});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS questions_fts_update AFTER UPDATE OF {_FTS_COLUMNS} ON questions BEGIN
+            INSERT INTO questions_fts (questions_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', old.id, {_FTS_OLD});
+            INSERT INTO questions_fts (rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW});
+        END
+    ''')
+    cursor.execute("INSERT INTO questions_fts (questions_fts) VALUES ('rebuild')")
+
+
+MIGRATIONS = [
+    (1, "base tables", _v1_base_tables),
+    (2, "question filter indexes", _v2_question_indexes),
+    (3, "materialized leaderboard", _v3_materialized_leaderboard),
+    (4, "player history index", _v4_history_index),
+    (5, "question text hash", _v5_question_text_hash),
+    (6, "per-player statistics", _v6_player_stats),
+    (7, "per-question answer statistics", _v7_question_stats),
+    (8, "answer event log", _v8_answer_log),
+    (9, "sample questions", _v9_sample_questions),
+    (10, "daily, weekly and monthly leaderboards", _v10_period_leaderboards),
+    (11, "player best score id index", _v11_player_best_score_index),
+    (12, "question search index", _v12_question_search),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Shard files hold only players, scores and the tables derived from them.
+# Versions missing here are recorded as applied on a shard without running.
+SHARD_MIGRATIONS = {
+    1: _v1_player_tables,
+    3: _v3_materialized_leaderboard,
+    4: _v4_history_index,
+    6: _v6_player_stats,
+    10: _v10_period_leaderboards,
+    11: _v11_player_best_score_index,
+}
+
+
+def table_columns(cursor, table):
+    """Return the column names of ``table``"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [column[1] for column in cursor.fetchall()]
+
+
+def fts5_available(cursor):
+    """True if this SQLite build includes the FTS5 extension"""
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    return bool(cursor.fetchone()[0])
+
+
+def rebuild_leaderboard(cursor):
+    """Recompute stored percentages and the per-player best table"""
+    cursor.execute('''
+        UPDATE scores SET percentage = ROUND((score * 100.0 / total_questions), 2)
+        WHERE percentage IS NOT ROUND((score * 100.0 / total_questions), 2)
+    ''')
+    cursor.execute("DELETE FROM player_best")
+    cursor.execute('''
+        INSERT INTO player_best (player_id, score_id, score, total_questions, percentage, quiz_date)
+        SELECT player_id, id, score, total_questions, percentage, quiz_date
+        FROM (
+            SELECT s.*, ROW_NUMBER() OVER (
+                PARTITION BY player_id
+                ORDER BY percentage DESC, score DESC, quiz_date DESC, id DESC
+            ) AS position
+            FROM scores s
+            WHERE player_id IS NOT NULL
+        )
+        WHERE position = 1
+    ''')
+
+
+def rebuild_player_stats(cursor):
+    """Recompute every player's running totals from the scores table"""
+    cursor.execute("DELETE FROM player_stats")
+    cursor.execute('''
+        INSERT INTO player_stats (player_id, attempts, total_score, total_questions,
+                                  percentage_sum, best_percentage, last_played)
+        SELECT player_id, COUNT(*), SUM(score), SUM(total_questions),
+               SUM(percentage), MAX(percentage), MAX(quiz_date)
+        FROM scores
+        WHERE player_id IS NOT NULL
+        GROUP BY player_id
+    ''')
+
+
+def rebuild_period_best(cursor):
+    """Recompute every period leaderboard from the scores table"""
+    cursor.execute("DELETE FROM period_best")
+    cursor.execute("SELECT MIN(id), MAX(id) FROM scores")
+    first, last = cursor.fetchone()
+    if first is not None:
+        cursor.execute(UPSERT_PERIOD_BEST_SQL, (first, last))
+
+
+def get_version(conn):
+    """Return the schema version recorded in the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=SCHEMA_VERSION, shard=False):
+    """Apply every pending migration up to ``target``, one transaction each
+
+    Returns the list of versions that were applied. Concurrent processes are
+    serialized by BEGIN IMMEDIATE, and the version is re-read under the lock
+    so each migration still runs exactly once. With ``shard`` only the
+    player and score migrations in SHARD_MIGRATIONS are run.
+    """
+    applied = []
+    if get_version(conn) >= target:
+        return applied
+
+    if conn.in_transaction:
+        conn.commit()
+
+    for version, description, upgrade in MIGRATIONS:
+        if version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_version(conn) >= version:
+                conn.rollback()
+                continue
+            if shard:
+                upgrade = SHARD_MIGRATIONS.get(version)
+            if upgrade is not None:
+                upgrade(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+def main():
+    import argparse
+    from connection_pool import get_pool, close_pool
+    from database import default_location
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--status', action='store_true', help="only report the schema version")
+    args = parser.parse_args()
+
+    location = default_location()
+    pool = get_pool(location)
+    try:
+        with pool.connection() as conn:
+            current = get_version(conn)
+            print(f"Schema version: {current} (latest {SCHEMA_VERSION})")
+            if args.status:
+                for version, description, _ in MIGRATIONS:
+                    state = "applied" if version <= current else "pending"
+                    print(f"  {version}. {description} [{state}]")
+                return
+            for version in migrate(conn):
+                print(f"  Applied migration {version}")
+    finally:
+        close_pool(location)
+
+
+if __name__ == "__main__":
+    main()
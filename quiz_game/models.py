@@ -1,29 +1,45 @@
 from datetime import datetime
 import random
 
+OPTION_KEYS = ('A', 'B', 'C', 'D')
+
+
 class Question:
     """Represents a quiz question with multiple choice options"""
     
+    # Large banks keep many of these in memory, so no per-instance __dict__
+    # and the options are stored as a tuple rather than a dict
+    __slots__ = ('id', 'text', '_options', 'correct_answer', 'category', 'difficulty')
+    
     def __init__(self, question_id, text, option_a, option_b, option_c, option_d, correct_answer, category="General", difficulty="Medium"):
         self.id = question_id
         self.text = text
-        self.options = {
-            'A': option_a,
-            'B': option_b,
-            'C': option_c,
-            'D': option_d
-        }
+        self._options = (option_a, option_b, option_c, option_d)
         self.correct_answer = correct_answer.upper()
         self.category = category
         self.difficulty = difficulty
     
+    @property
+    def options(self):
+        """Options keyed by letter: {'A': ..., 'B': ..., 'C': ..., 'D': ...}"""
+        return dict(zip(OPTION_KEYS, self._options))
+    
+    def get_option(self, key):
+        """Text of a single option, without building the options dict"""
+        return self._options[OPTION_KEYS.index(key.upper())]
+    
+    @classmethod
+    def from_row(cls, row):
+        """Build a question from a (id, text, a, b, c, d, correct, category, difficulty) row"""
+        return cls(*row)
+    
     def is_correct(self, answer):
         """Check if the provided answer is correct"""
         return answer.upper() == self.correct_answer
     
     def get_options_text(self):
         """Get formatted options text for display"""
-        return "\n".join([f"{key}. {value}" for key, value in self.options.items()])
+        return "\n".join([f"{key}. {value}" for key, value in zip(OPTION_KEYS, self._options)])
     
     def __str__(self):
         return f"{self.text}\n{self.get_options_text()}"
@@ -32,6 +48,8 @@ class Question:
 class Player:
     """Represents a player with name and current score"""
     
+    __slots__ = ('id', 'name', 'current_score', 'total_questions_answered')
+    
     def __init__(self, name, player_id=None):
         self.id = player_id
         self.name = name
@@ -66,6 +84,8 @@ class Player:
 class Quiz:
     """Manages a quiz session with questions and scoring"""
     
+    __slots__ = ('questions', 'current_question_index', 'is_completed', 'start_time', 'end_time')
+    
     def __init__(self, questions=None):
         self.questions = questions or []
         self.current_question_index = 0
@@ -73,6 +93,11 @@ class Quiz:
         self.start_time = None
         self.end_time = None
     
+    @classmethod
+    def from_pack(cls, pack, num_questions=5, category=None, difficulty=None):
+        """Draw a quiz straight from a QuizPack, without touching the database"""
+        return cls(pack.sample(num_questions, category, difficulty))
+    
     def add_question(self, question):
         """Add a question to the quiz"""
         self.questions.append(question)
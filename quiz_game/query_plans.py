@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Query plan guard for the Quiz Game database
+Runs EXPLAIN QUERY PLAN on the hot queries and fails if any of them falls
+back to a full table scan or a temporary sort.
+
+Usage:
+    python query_plans.py [--verbose]
+"""
+
+import argparse
+import re
+import sys
+
+# name -> (sql, sample parameters)
+HOT_QUERIES = {
+    'leaderboard': ('''
+        SELECT p.name, s.score, s.total_questions, s.quiz_date, s.percentage
+        FROM scores s JOIN players p ON s.player_id = p.id
+        ORDER BY s.percentage DESC, s.score DESC, s.quiz_date DESC LIMIT ?
+    ''', (10,)),
+    'leaderboard_best': ('''
+        SELECT p.name, s.score, s.total_questions, s.quiz_date, s.percentage
+        FROM player_best s JOIN players p ON s.player_id = p.id
+        ORDER BY s.percentage DESC, s.score DESC, s.quiz_date DESC LIMIT ?
+    ''', (10,)),
+    'leaderboard_period': ('''
+        SELECT p.name, b.score, b.total_questions, b.quiz_date, b.percentage
+        FROM period_best b JOIN players p ON b.player_id = p.id
+        WHERE b.period = ? AND b.bucket = ?
+        ORDER BY b.percentage DESC, b.score DESC, b.quiz_date DESC LIMIT ?
+    ''', ('week', '2024-01-01', 10)),
+    'player_history': ('''
+        SELECT s.score, s.total_questions, s.quiz_date, s.percentage
+        FROM scores s
+        WHERE s.player_id = (SELECT id FROM players WHERE name = ?)
+        ORDER BY s.quiz_date DESC, s.id DESC
+    ''', ('player',)),
+    'player_history_page': ('''
+        SELECT s.score, s.total_questions, s.quiz_date, s.percentage, s.id
+        FROM scores s
+        WHERE s.player_id = (SELECT id FROM players WHERE name = ?)
+          AND (s.quiz_date, s.id) < (?, ?)
+        ORDER BY s.quiz_date DESC, s.id DESC LIMIT ?
+    ''', ('player', '2024-01-01 00:00:00', 1, 21)),
+    'player_stats': ('''
+        SELECT ps.attempts, ps.percentage_sum, b.score, b.total_questions, ps.best_percentage
+        FROM players p
+        JOIN player_stats ps ON ps.player_id = p.id
+        JOIN player_best b ON b.player_id = p.id
+        WHERE p.name = ?
+    ''', ('player',)),
+    'score_distribution': ('''
+        SELECT percentage, COUNT(*) FROM scores
+        WHERE percentage IS NOT NULL GROUP BY percentage ORDER BY percentage
+    ''', ()),
+    'question_counts': (
+        "SELECT category, difficulty, COUNT(*) FROM questions GROUP BY category, difficulty", ()),
+    'player_lookup': ("SELECT id FROM players WHERE name = ?", ('player',)),
+    'questions_by_category': (
+        "SELECT id FROM questions WHERE category = ? AND id > ?", ('Science', 0)),
+    'questions_by_category_difficulty': (
+        "SELECT id FROM questions WHERE category = ? AND difficulty = ? AND id > ?", ('Science', 'Hard', 0)),
+    'questions_by_difficulty': (
+        "SELECT id FROM questions WHERE difficulty = ? AND id > ?", ('Hard', 0)),
+    'question_id_range': (
+        "SELECT (SELECT MIN(id) FROM questions), (SELECT MAX(id) FROM questions)", ()),
+}
+
+# A bare "SCAN <table>" reads every row; "SCAN <table> USING INDEX" walks an
+# index in order and stops at the LIMIT, which is what the leaderboard relies on.
+FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)(\w+)\b(?! USING (COVERING )?INDEX)')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE')
+
+
+def explain(conn, sql, params):
+    """Return the EXPLAIN QUERY PLAN detail lines for ``sql``"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def check_query_plans(conn, queries=None):
+    """Return {query name: [offending plan lines]} for every regressed query"""
+    problems = {}
+    for name, (sql, params) in (queries or HOT_QUERIES).items():
+        bad = [line for line in explain(conn, sql, params)
+               if FULL_SCAN.search(line) or TEMP_SORT.search(line)]
+        if bad:
+            problems[name] = bad
+    return problems
+
+
+def main():
+    from database import Database
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--verbose', action='store_true', help="print every plan")
+    args = parser.parse_args()
+
+    db = Database()
+    try:
+        with db.connection() as conn:
+            if args.verbose:
+                for name, (sql, params) in HOT_QUERIES.items():
+                    print(f"{name}:")
+                    for line in explain(conn, sql, params):
+                        print(f"    {line}")
+            problems = check_query_plans(conn)
+    finally:
+        db.close()
+
+    if not problems:
+        print(f"All {len(HOT_QUERIES)} hot queries use indexes.")
+        return 0
+    for name, lines in problems.items():
+        print(f"❌ {name}:")
+        for line in lines:
+            print(f"    {line}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+import random
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+from connection_pool import location_key
+from models import Question
+from question_sampler import QUESTION_COLUMNS
+
+
+class QuestionCache:
+    """Process-wide cache of ready-made Question objects
+
+    Categories are loaded lazily, one query each, and kept in LRU order; when
+    more than ``max_questions`` are cached the least recently used categories
+    are dropped. Quizzes are sampled from memory. A request that cannot be
+    served from a bounded cache (a category larger than the limit, or an
+    unfiltered draw over a bank larger than it) falls back to the database
+    sampler and is counted as a bypass.
+
+    Before each draw the cache compares ``MAX(id)`` with the highest id it
+    has seen, an index seek, and drops the categories that gained questions
+    since, so imports and inserts from other processes or connections show
+    up on the next quiz. Deleted or edited rows still need ``invalidate()``.
+    """
+
+    def __init__(self, db, max_questions=100000):
+        self.db = db
+        self.max_questions = max_questions
+        self._lock = threading.RLock()
+        self._categories = OrderedDict()   # category -> {difficulty: [Question]}
+        self._sizes = {}                   # cached category -> question count
+        self._counts = None                # category -> row count in the table
+        self._max_id = None                # highest question id accounted for
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    def sample(self, count, category=None, difficulty=None):
+        """Return up to ``count`` distinct random Question objects"""
+        if count <= 0:
+            return []
+
+        with self._lock:
+            self._refresh()
+            counts = self._category_counts()
+            names = [category] if category is not None else list(counts)
+            needed = sum(counts.get(name, 0) for name in names)
+            if needed > self.max_questions:
+                self.bypasses += 1
+                buckets = None
+            else:
+                buckets = []
+                for name in names:
+                    if name not in counts:
+                        continue
+                    by_difficulty = self._get_category(name)
+                    if difficulty is None:
+                        buckets.extend(by_difficulty.values())
+                    elif difficulty in by_difficulty:
+                        buckets.append(by_difficulty[difficulty])
+
+        if buckets is None:
+            rows = self.db.sampler.sample(count, category=category, difficulty=difficulty)
+            return [Question.from_row(row) for row in rows]
+        return self._pick(buckets, count)
+
+    def _pick(self, buckets, count):
+        """Sample across several lists as if they were one"""
+        offsets = []
+        total = 0
+        for bucket in buckets:
+            offsets.append(total)
+            total += len(bucket)
+        picked = []
+        for index in random.sample(range(total), min(count, total)):
+            position = bisect_right(offsets, index) - 1
+            picked.append(buckets[position][index - offsets[position]])
+        return picked
+
+    def _refresh(self):
+        """Drop cached categories that gained rows since the last check"""
+        with self.db.connection() as conn:
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM questions").fetchone()[0]
+            if self._max_id is None:
+                self._max_id = max_id
+                return
+            if max_id <= self._max_id:
+                return
+            changed = [row[0] for row in conn.execute(
+                "SELECT DISTINCT category FROM questions WHERE id > ?", (self._max_id,))]
+        self._max_id = max_id
+        for category in changed:
+            self._categories.pop(category, None)
+            self._sizes.pop(category, None)
+        self._counts = None
+
+    def _category_counts(self):
+        if self._counts is None:
+            with self.db.connection() as conn:
+                rows = conn.execute("SELECT category, COUNT(*) FROM questions GROUP BY category").fetchall()
+            self._counts = dict(rows)
+        return self._counts
+
+    def _get_category(self, category):
+        cached = self._categories.get(category)
+        if cached is not None:
+            self.hits += 1
+            self._categories.move_to_end(category)
+            return cached
+
+        self.misses += 1
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {QUESTION_COLUMNS} FROM questions WHERE category = ?", (category,)
+            ).fetchall()
+        by_difficulty = {}
+        for row in rows:
+            by_difficulty.setdefault(row[8], []).append(Question.from_row(row))
+
+        self._categories[category] = by_difficulty
+        self._sizes[category] = len(rows)
+        self._counts[category] = len(rows)
+        self._evict(keep=category)
+        return by_difficulty
+
+    def _evict(self, keep):
+        while sum(self._sizes.values()) > self.max_questions and len(self._categories) > 1:
+            oldest = next(iter(self._categories))
+            if oldest == keep:
+                self._categories.move_to_end(oldest)
+                continue
+            del self._categories[oldest]
+            del self._sizes[oldest]
+            self.evictions += 1
+
+    def add(self, question):
+        """Incrementally add a newly inserted question"""
+        with self._lock:
+            if self._max_id is not None and question.id == self._max_id + 1:
+                # Nothing from elsewhere in between, so no reload is needed
+                self._max_id = question.id
+            if self._counts is not None:
+                self._counts[question.category] = self._counts.get(question.category, 0) + 1
+            cached = self._categories.get(question.category)
+            if cached is not None:
+                cached.setdefault(question.difficulty, []).append(question)
+                self._sizes[question.category] += 1
+                self._evict(keep=question.category)
+
+    def invalidate(self, categories=None):
+        """Drop the given categories (or everything) so they reload on next use"""
+        with self._lock:
+            if categories is None:
+                self._categories.clear()
+                self._sizes.clear()
+                self._counts = None
+                self._max_id = None
+                return
+            for category in categories:
+                self._categories.pop(category, None)
+                self._sizes.pop(category, None)
+            self._counts = None
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypasses': self.bypasses,
+                'evictions': self.evictions,
+                'categories': len(self._categories),
+                'questions': sum(self._sizes.values()),
+                'max_questions': self.max_questions,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_question_cache(db, max_questions=100000):
+    """Return the shared cache for ``db``'s file, creating it on first use"""
+    key = location_key(db.db_path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = QuestionCache(db, max_questions)
+            _caches[key] = cache
+        return cache
+
+
+def drop_question_cache(db_path):
+    """Forget the cache for a database that is going away"""
+    with _caches_lock:
+        _caches.pop(location_key(db_path), None)
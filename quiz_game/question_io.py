@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Bulk question import/export for the Quiz Game
+Streams CSV or JSONL question packs in and out of the database with
+constant memory; plain JSON arrays are also accepted. Imports are validated, deduplicated against existing
+questions (ignoring case, accents, punctuation and spacing) and inserted
+in batches inside a single transaction.
+
+Usage:
+    python question_io.py import pack.csv [--batch-size 5000]
+    python question_io.py import pack.jsonl --format jsonl
+    python question_io.py import pack.json
+    python question_io.py export questions.csv [--category Science]
+
+All formats use the columns: text, option_a, option_b, option_c,
+option_d, correct_answer, category, difficulty
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from database import Database
+from question_search import normalize_question_text
+
+FIELDS = ['text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer', 'category', 'difficulty']
+DIFFICULTIES = ('Easy', 'Medium', 'Hard')
+
+
+class InvalidQuestion(ValueError):
+    """Raised for a question record that cannot be imported"""
+
+
+class TransferStats:
+    """Counters and timing for one import or export run"""
+
+    def __init__(self):
+        self.read = 0
+        self.written = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    @property
+    def rows_per_second(self):
+        return self.written / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (f"read {self.read}, written {self.written}, duplicates {self.duplicates}, "
+                f"invalid {self.invalid} in {self.elapsed:.2f}s ({self.rows_per_second:,.0f} rows/s)")
+
+
+def detect_format(path, fmt=None):
+    """Pick csv, jsonl or json from an explicit format or the file extension"""
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if ext == '.json':
+        return 'json'
+    return 'csv'
+
+
+def read_csv(path):
+    """Yield one dict per CSV row"""
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+
+def read_jsonl(path):
+    """Yield one dict per non-empty JSONL line"""
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield InvalidQuestion(f"line {line_number}: {e}")
+
+
+def read_json(path):
+    """Yield each object of a JSON array file
+
+    Unlike the other readers this parses the whole file at once; use JSONL
+    for packs too large to hold in memory.
+    """
+    with open(path, encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise InvalidQuestion(f"{path} is not valid JSON: {e}") from None
+    if not isinstance(data, list):
+        raise InvalidQuestion(f"{path} must hold a JSON array of question objects")
+    yield from data
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl, 'json': read_json}
+
+
+def validate(record):
+    """Turn a raw record into an insert tuple, or raise InvalidQuestion"""
+    if isinstance(record, InvalidQuestion):
+        raise record
+    if not isinstance(record, dict):
+        raise InvalidQuestion("record is not an object")
+
+    values = {field: str(record.get(field) or '').strip() for field in FIELDS}
+    missing = [field for field in FIELDS[:5] if not values[field]]
+    if missing:
+        raise InvalidQuestion(f"missing {', '.join(missing)}")
+
+    values['correct_answer'] = values['correct_answer'].upper()
+    if values['correct_answer'] not in ('A', 'B', 'C', 'D'):
+        raise InvalidQuestion(f"correct_answer must be A, B, C or D, got {values['correct_answer']!r}")
+
+    values['category'] = values['category'] or 'General'
+    values['difficulty'] = values['difficulty'].title() or 'Medium'
+    if values['difficulty'] not in DIFFICULTIES:
+        raise InvalidQuestion(f"difficulty must be one of {', '.join(DIFFICULTIES)}")
+
+    return tuple(values[field] for field in FIELDS)
+
+
+def batched(rows, size):
+    """Group an iterable into lists of at most ``size`` items"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_questions(db, records, batch_size=5000, dedupe=True, stats=None, on_error=None):
+    """Validate, dedupe and insert a stream of records in one transaction
+
+    Each batch is checked against the questions already in the table (which
+    includes earlier batches of this import) and against itself, comparing
+    normalized text, then inserted with a single executemany.
+    """
+    stats = stats or TransferStats()
+
+    def valid_rows():
+        for record in records:
+            stats.read += 1
+            try:
+                yield validate(record)
+            except InvalidQuestion as e:
+                stats.invalid += 1
+                if on_error:
+                    on_error(stats.read, e)
+
+    with db.connection():
+        for batch in batched(valid_rows(), batch_size):
+            if dedupe:
+                existing = db.find_existing_questions({row[0] for row in batch})
+                seen = set()
+                unique = []
+                for row in batch:
+                    key = normalize_question_text(row[0])
+                    if row[0] in existing or key in seen:
+                        stats.duplicates += 1
+                        continue
+                    seen.add(key)
+                    unique.append(row)
+                batch = unique
+            if batch:
+                db.add_questions(batch)
+                stats.written += len(batch)
+
+    return stats.finish()
+
+
+def export_questions(db, out, fmt='csv', category=None, fetch_size=5000, stats=None):
+    """Stream every question (optionally one category) to a text file object"""
+    stats = stats or TransferStats()
+    sql = f"SELECT {', '.join(FIELDS)} FROM questions"
+    params = ()
+    if category:
+        sql += " WHERE category = ?"
+        params = (category,)
+
+    writer = csv.writer(out) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(FIELDS)
+    elif fmt == 'json':
+        out.write("[")
+
+    with db.connection() as conn:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            stats.read += len(rows)
+            if writer:
+                writer.writerows(rows)
+            elif fmt == 'json':
+                out.writelines(("\n  " if stats.written + i == 0 else ",\n  ")
+                               + json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False)
+                               for i, row in enumerate(rows))
+            else:
+                out.writelines(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + "\n" for row in rows)
+            stats.written += len(rows)
+
+    if fmt == 'json':
+        out.write("\n]\n")
+    return stats.finish()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    importer = commands.add_parser('import', help="load questions from a CSV/JSONL/JSON file")
+    importer.add_argument('path')
+    importer.add_argument('--format', choices=list(READERS))
+    importer.add_argument('--batch-size', type=int, default=5000)
+    importer.add_argument('--no-dedupe', action='store_true', help="insert even if the question already exists")
+    importer.add_argument('--quiet', action='store_true', help="don't print invalid rows")
+
+    exporter = commands.add_parser('export', help="write questions to a CSV/JSONL/JSON file ('-' for stdout)")
+    exporter.add_argument('path')
+    exporter.add_argument('--format', choices=list(READERS))
+    exporter.add_argument('--category')
+
+    args = parser.parse_args()
+    fmt = detect_format(args.path, args.format)
+    db = Database()
+
+    try:
+        if args.command == 'import':
+            records = READERS[fmt](args.path)
+            on_error = None if args.quiet else (lambda n, e: print(f"  ⚠️  record {n}: {e}", file=sys.stderr))
+            try:
+                stats = import_questions(db, records, args.batch_size, not args.no_dedupe, on_error=on_error)
+            except InvalidQuestion as e:
+                print(f"❌ {e}", file=sys.stderr)
+                return 1
+            print(f"Imported questions: {stats}")
+        else:
+            if args.path == '-':
+                stats = export_questions(db, sys.stdout, fmt, args.category)
+            else:
+                with open(args.path, 'w', newline='', encoding='utf-8') as out:
+                    stats = export_questions(db, out, fmt, args.category)
+            print(f"Exported questions: {stats}", file=sys.stderr)
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import random
+import threading
+from array import array
+
+QUESTION_COLUMNS = "id, text, option_a, option_b, option_c, option_d, correct_answer, category, difficulty"
+
+
+class QuestionSampler:
+    """Pick k distinct random questions without scanning or sorting the table
+
+    Unfiltered draws probe random ids between MIN(id) and MAX(id), which are
+    both single index seeks, and redraw whatever lands in a gap left by a
+    delete. Filtered draws (and tables too sparse to probe) sample from a
+    cached id list that is read through the category/difficulty indexes and
+    extended incrementally when new rows appear.
+    """
+
+    PROBE_ROUNDS = 4
+    OVERSAMPLE = 2
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self._id_lists = {}
+
+    def sample(self, count, category=None, difficulty=None):
+        """Return up to ``count`` random question rows in random order"""
+        if count <= 0:
+            return []
+
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            rows = None
+            if category is None and difficulty is None:
+                rows = self._sample_by_id_range(cursor, count)
+            if rows is None:
+                rows = self._sample_from_id_list(cursor, count, category, difficulty)
+
+        random.shuffle(rows)
+        return rows
+
+    def invalidate(self):
+        """Forget every cached id list (needed after deletes)"""
+        with self._lock:
+            self._id_lists.clear()
+
+    def _fetch_by_ids(self, cursor, ids):
+        placeholders = ",".join("?" * len(ids))
+        cursor.execute(
+            f"SELECT {QUESTION_COLUMNS} FROM questions WHERE id IN ({placeholders})",
+            list(ids),
+        )
+        return cursor.fetchall()
+
+    def _sample_by_id_range(self, cursor, count):
+        """Rejection-sample ids from [MIN(id), MAX(id)]; None if too sparse"""
+        cursor.execute("SELECT (SELECT MIN(id) FROM questions), (SELECT MAX(id) FROM questions)")
+        low, high = cursor.fetchone()
+        if low is None:
+            return []
+
+        span = high - low + 1
+        if span < count * self.OVERSAMPLE:
+            # Small tables are cheaper to handle from the id list
+            return None
+
+        found = {}
+        tried = set()
+        for _ in range(self.PROBE_ROUNDS):
+            need = count - len(found)
+            candidates = set()
+            while len(candidates) < need * self.OVERSAMPLE and len(tried) + len(candidates) < span:
+                candidate = random.randint(low, high)
+                if candidate not in tried:
+                    candidates.add(candidate)
+            if not candidates:
+                break
+            tried |= candidates
+
+            for row in self._fetch_by_ids(cursor, candidates):
+                if len(found) < count:
+                    found[row[0]] = row
+            if len(found) >= count:
+                return list(found.values())
+
+        return None
+
+    def _sample_from_id_list(self, cursor, count, category, difficulty):
+        """Sample from a cached, incrementally refreshed list of matching ids"""
+        for _ in range(2):
+            ids = self._get_id_list(cursor, category, difficulty)
+            picked = random.sample(ids, min(count, len(ids)))
+            if not picked:
+                return []
+
+            rows = self._fetch_by_ids(cursor, picked)
+            if len(rows) == len(picked):
+                return rows
+
+            # Some cached ids were deleted; rebuild this list and try again
+            with self._lock:
+                self._id_lists.pop((category, difficulty), None)
+        return rows
+
+    def _get_id_list(self, cursor, category, difficulty):
+        key = (category, difficulty)
+        conditions = []
+        params = []
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if difficulty is not None:
+            conditions.append("difficulty = ?")
+            params.append(difficulty)
+
+        cursor.execute("SELECT MAX(id) FROM questions")
+        max_id = cursor.fetchone()[0] or 0
+
+        with self._lock:
+            cached = self._id_lists.get(key)
+        if cached is not None and cached[1] >= max_id:
+            return cached[0]
+
+        ids = array('q') if cached is None else array('q', cached[0])
+        last_seen = 0 if cached is None else cached[1]
+        where = " AND ".join(conditions + ["id > ?"])
+        cursor.execute(f"SELECT id FROM questions WHERE {where}", params + [last_seen])
+        ids.extend(row[0] for row in cursor)
+
+        with self._lock:
+            self._id_lists[key] = (ids, max_id)
+        return ids
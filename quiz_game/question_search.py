@@ -0,0 +1,42 @@
+import unicodedata
+
+# Columns of questions indexed by questions_fts, in index order
+SEARCH_COLUMNS = ('text', 'option_a', 'option_b', 'option_c', 'option_d')
+
+# ASCII punctuation and control characters -> space, for the fast path
+_ASCII_SEPARATORS = str.maketrans({chr(i): " " for i in range(128) if not chr(i).isalnum()})
+
+
+def normalize_question_text(text):
+    """Fold case, accents, punctuation and spacing so near-identical questions compare equal
+
+    "What's the capital of France?" and "WHAT'S THE CAPITAL OF FRANCE" both
+    become "what s the capital of france".
+    """
+    if text.isascii():
+        return " ".join(text.lower().translate(_ASCII_SEPARATORS).split())
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    words = "".join(ch if ch.isalnum() else " " for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(words.split())
+
+
+def question_text_hash(text):
+    """Signed 64-bit hash of the normalized text, stored in questions.text_hash"""
+    import hashlib  # only needed once questions are written; keeps startup imports small
+
+    digest = hashlib.blake2b(normalize_question_text(text).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def fts_query(terms):
+    """Turn free text into an FTS5 query: every word must match, the last as a prefix
+
+    Each word is quoted, so FTS5 operators and punctuation in user input are
+    treated as plain text. Returns None when there is nothing to search for.
+    """
+    words = normalize_question_text(terms).split()
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += '*'
+    return " ".join(quoted)
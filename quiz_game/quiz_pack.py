@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Precompiled quiz packs for the Quiz Game
+Serializes a fixed set of questions into a compact binary file that is
+memory-mapped read-only, so every worker process that opens the same pack
+shares one copy of it through the OS page cache. Questions are drawn
+straight from the mapping: nothing is queried, and a question's strings are
+only decoded, from the mapped bytes, when they are read.
+
+Usage:
+    python quiz_pack.py build tournament.qpk [--category Science] [--difficulty Easy]
+                        [--ids 1,5,9] [--limit 500] [--db quiz_game.db]
+    python quiz_pack.py info tournament.qpk
+
+Play from a pack with QUIZ_GAME_PACK=tournament.qpk python main.py,
+python server.py --pack tournament.qpk or python simulator.py --pack tournament.qpk.
+
+File layout (little-endian):
+    header       magic "QZPK", version, question/group/name counts, string data size
+    ids          int64 per question
+    offsets      uint32 start of every string, plus one end offset; each question
+                 has 5 strings (text, options A-D), then the category and
+                 difficulty names follow
+    answers      one byte per question, 0-3 for A-D
+    groups       (category name, difficulty name, first question, end question);
+                 questions are stored sorted by category and difficulty
+    strings      UTF-8 text
+"""
+
+import mmap
+import os
+import random
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+
+from models import OPTION_KEYS, Question
+from question_sampler import QUESTION_COLUMNS
+
+MAGIC = b'QZPK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIII')   # magic, version, reserved, questions, groups, names, string bytes
+GROUP = struct.Struct('<HHII')         # category name, difficulty name, first, end
+STRINGS_PER_QUESTION = 5               # text, option_a..option_d
+
+
+def select_questions(db, category=None, difficulty=None, ids=None, limit=None):
+    """Question rows for a pack, in id order"""
+    sql = f"SELECT {QUESTION_COLUMNS} FROM questions"
+    conditions, params = [], []
+    if category is not None:
+        conditions.append("category = ?")
+        params.append(category)
+    if difficulty is not None:
+        conditions.append("difficulty = ?")
+        params.append(difficulty)
+    if ids:
+        conditions.append(f"id IN ({','.join('?' * len(ids))})")
+        params.extend(ids)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with db.connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def write_pack(path, rows):
+    """Write (id, text, a, b, c, d, correct, category, difficulty) rows as a pack
+
+    The file is written next to ``path`` and renamed over it, so processes
+    that already have the old pack mapped keep reading the old contents.
+    Returns the number of questions written.
+    """
+    rows = sorted(rows, key=lambda row: (row[7], row[8], row[0]))
+    if not rows:
+        raise ValueError("A quiz pack needs at least one question")
+
+    names = {}
+    groups = []
+    ids = array('q')
+    answers = bytearray()
+    offsets = array('I')
+    strings = []
+    size = 0
+
+    def add_string(value):
+        nonlocal size
+        data = value.encode('utf-8')
+        offsets.append(size)
+        strings.append(data)
+        size += len(data)
+
+    for index, row in enumerate(rows):
+        question_id, text, a, b, c, d, correct, category, difficulty = row
+        correct = correct.upper()
+        if correct not in OPTION_KEYS:
+            raise ValueError(f"Question {question_id} has an invalid correct answer {correct!r}")
+        key = (names.setdefault(category, len(names)), names.setdefault(difficulty, len(names)))
+        if not groups or (groups[-1][0], groups[-1][1]) != key:
+            groups.append([key[0], key[1], index, index])
+        groups[-1][3] = index + 1
+        ids.append(question_id)
+        answers.append(OPTION_KEYS.index(correct))
+        for value in (text, a, b, c, d):
+            add_string(value)
+    for name in names:
+        add_string(name)
+    if size > 0xFFFFFFFF:
+        raise ValueError("Quiz pack text is over 4 GiB")
+    offsets.append(size)
+
+    if sys.byteorder != 'little':
+        ids.byteswap()
+        offsets.byteswap()
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(rows), len(groups), len(names), size))
+        f.write(ids.tobytes())
+        f.write(offsets.tobytes())
+        f.write(answers)
+        for group in groups:
+            f.write(GROUP.pack(*group))
+        f.writelines(strings)
+    os.replace(temp_path, path)
+    return len(rows)
+
+
+def build_pack(db, path, category=None, difficulty=None, ids=None, limit=None):
+    """Write the selected questions of ``db`` to a pack; return the question count"""
+    rows = select_questions(db, category, difficulty, ids, limit)
+    if not rows:
+        raise ValueError("No questions match the selection")
+    return write_pack(path, rows)
+
+
+class PackQuestion(Question):
+    """A Question read from a QuizPack
+
+    Only the pack and the question's position are stored; every attribute
+    is decoded from the mapped file when it is read, and all of Question's
+    methods work unchanged on top of that.
+    """
+
+    __slots__ = ('pack', 'index')
+
+    def __init__(self, pack, index):
+        self.pack = pack
+        self.index = index
+
+    @property
+    def id(self):
+        return self.pack._ids[self.index]
+
+    @property
+    def text(self):
+        return self.pack._string(self.index * STRINGS_PER_QUESTION)
+
+    @property
+    def _options(self):
+        first = self.index * STRINGS_PER_QUESTION + 1
+        return tuple(self.pack._string(first + i) for i in range(len(OPTION_KEYS)))
+
+    @property
+    def correct_answer(self):
+        return OPTION_KEYS[self.pack._answers[self.index]]
+
+    @property
+    def category(self):
+        return self.pack._group_of(self.index)[0]
+
+    @property
+    def difficulty(self):
+        return self.pack._group_of(self.index)[1]
+
+    def get_option(self, key):
+        """Decode just the one option"""
+        position = OPTION_KEYS.index(key.upper())
+        return self.pack._string(self.index * STRINGS_PER_QUESTION + 1 + position)
+
+
+class QuizPack:
+    """Read-only, memory-mapped view of a quiz pack file
+
+    Opening a pack reads only the header and the group table; ids, answers
+    and strings stay in the mapping and are sliced out through memoryviews
+    without copying.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise ValueError("Quiz packs can only be mapped on little-endian machines")
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        try:
+            self._map_sections()
+        except ValueError:
+            self.close()
+            raise
+
+    def _view(self, start, end, fmt=None):
+        view = self._root[start:end]
+        self._views.append(view)
+        if fmt is not None:
+            view = view.cast(fmt)
+            self._views.append(view)
+        return view
+
+    def _map_sections(self):
+        self._root = memoryview(self._mmap)
+        if len(self._root) < HEADER.size or self._root[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a quiz pack")
+        _, version, _, count, groups, names, size = HEADER.unpack_from(self._root)
+        if version != VERSION:
+            raise ValueError(f"{self.path} is quiz pack version {version}, expected {VERSION}")
+
+        string_count = count * STRINGS_PER_QUESTION + names
+        sections = (('_ids', 8 * count, 'q'), ('_offsets', 4 * (string_count + 1), 'I'), ('_answers', count, None))
+        position = HEADER.size
+        if position + sum(length for _, length, _ in sections) + groups * GROUP.size + size != len(self._root):
+            raise ValueError(f"{self.path} is truncated or corrupt")
+        for attribute, length, fmt in sections:
+            setattr(self, attribute, self._view(position, position + length, fmt))
+            position += length
+        group_rows = [GROUP.unpack_from(self._root, position + i * GROUP.size) for i in range(groups)]
+        position += groups * GROUP.size
+        self._strings = self._view(position, position + size)
+
+        name_list = [self._string(count * STRINGS_PER_QUESTION + i) for i in range(names)]
+        self.groups = [(name_list[category], name_list[difficulty], first, end)
+                       for category, difficulty, first, end in group_rows]
+        self._group_starts = [group[2] for group in self.groups]
+
+    def _string(self, number):
+        return str(self._strings[self._offsets[number]:self._offsets[number + 1]], 'utf-8')
+
+    def _group_of(self, index):
+        return self.groups[bisect_right(self._group_starts, index) - 1]
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self._ids):
+            raise IndexError("quiz pack index out of range")
+        return PackQuestion(self, index)
+
+    def categories(self):
+        """Category -> question count"""
+        counts = {}
+        for category, _, first, end in self.groups:
+            counts[category] = counts.get(category, 0) + end - first
+        return counts
+
+    def sample(self, count, category=None, difficulty=None):
+        """Return up to ``count`` distinct random PackQuestions, in random order"""
+        ranges = [(first, end) for group_category, group_difficulty, first, end in self.groups
+                  if category in (None, group_category) and difficulty in (None, group_difficulty)]
+        offsets = []
+        total = 0
+        for first, end in ranges:
+            offsets.append(total)
+            total += end - first
+        picked = []
+        for position in random.sample(range(total), min(max(count, 0), total)):
+            group = bisect_right(offsets, position) - 1
+            picked.append(PackQuestion(self, ranges[group][0] + position - offsets[group]))
+        return picked
+
+    def close(self):
+        """Unmap the file; questions taken from the pack stop working"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if getattr(self, '_root', None) is not None:
+            self._root.release()
+            self._root = None
+        self._mmap.close()
+
+
+_packs = {}
+_packs_lock = threading.Lock()
+
+
+def open_pack(path):
+    """Return this process's mapping of the pack at ``path``, opening it on first use
+
+    A pack rebuilt in place (a new file renamed over the old one) is mapped
+    again on the next call; the old mapping is left to the questions still
+    using it.
+    """
+    key = os.path.realpath(path)
+    inode = os.stat(key).st_ino
+    with _packs_lock:
+        cached = _packs.get(key)
+        if cached is None or cached[0] != inode:
+            cached = (inode, QuizPack(key))
+            _packs[key] = cached
+        return cached[1]
+
+
+def print_info(pack):
+    print(f"📦 {pack.path}: {len(pack)} questions, {os.path.getsize(pack.path)} bytes")
+    print(f"   {'Category':<20} {'Difficulty':<12} {'Questions':>9}")
+    for category, difficulty, first, end in pack.groups:
+        print(f"   {category:<20} {difficulty:<12} {end - first:>9}")
+
+
+def main():
+    import argparse
+    from database import Database, default_location
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    builder = commands.add_parser('build', help="write selected questions to a pack")
+    builder.add_argument('path')
+    builder.add_argument('--db', default=default_location(), help="database to read questions from")
+    builder.add_argument('--category')
+    builder.add_argument('--difficulty')
+    builder.add_argument('--ids', help="comma-separated question ids")
+    builder.add_argument('--limit', type=int, help="take at most this many questions, lowest ids first")
+
+    info = commands.add_parser('info', help="show what a pack contains")
+    info.add_argument('path')
+
+    args = parser.parse_args()
+    try:
+        if args.command == 'build':
+            ids = [int(value) for value in args.ids.split(',')] if args.ids else None
+            db = Database(args.db)
+            try:
+                count = build_pack(db, args.path, args.category, args.difficulty, ids, args.limit)
+            finally:
+                db.close()
+            print(f"✅ Wrote {count} questions to {args.path}")
+        print_info(open_pack(args.path))
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Statistics report for the Quiz Game database
+Each statistic is computed with at most one pass over an index, or read from
+the counters kept by save_score (player_stats, player_best), and its compute
+time is reported alongside it.
+"""
+
+import math
+import time
+
+# Score distribution buckets, in percentage points
+HISTOGRAM_WIDTH = 10
+PERCENTILES = (25, 50, 75, 90, 99)
+
+
+def weighted_percentile(value_counts, total, pct):
+    """Nearest-rank percentile over sorted (value, count) pairs"""
+    if not total:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * total))
+    seen = 0
+    for value, count in value_counts:
+        seen += count
+        if seen >= rank:
+            return value
+    return value_counts[-1][0]
+
+
+def question_stats(cursor, top):
+    """Question counts by category and difficulty, from one covering-index scan"""
+    cursor.execute("SELECT category, difficulty, COUNT(*) FROM questions GROUP BY category, difficulty")
+    by_category = {}
+    by_difficulty = {}
+    for category, difficulty, count in cursor.fetchall():
+        by_category[category] = by_category.get(category, 0) + count
+        by_difficulty[difficulty] = by_difficulty.get(difficulty, 0) + count
+    return {
+        'total': sum(by_category.values()),
+        'by_category': by_category,
+        'by_difficulty': by_difficulty,
+    }
+
+
+def player_stats(cursor, top):
+    """Registered players and players with at least one score"""
+    cursor.execute("SELECT (SELECT COUNT(*) FROM players), COUNT(*) FROM player_stats")
+    total, active = cursor.fetchone()
+    return {'total': total, 'active': active}
+
+
+def score_stats(cursor, top):
+    """Attempt count, mean, percentiles and histogram from one pass over the leaderboard index"""
+    cursor.execute('''
+        SELECT percentage, COUNT(*) FROM scores
+        WHERE percentage IS NOT NULL
+        GROUP BY percentage
+        ORDER BY percentage
+    ''')
+    value_counts = cursor.fetchall()
+    attempts = sum(count for _, count in value_counts)
+
+    buckets = [0] * (100 // HISTOGRAM_WIDTH)
+    for percentage, count in value_counts:
+        index = min(int(percentage // HISTOGRAM_WIDTH), len(buckets) - 1)
+        buckets[index] += count
+    histogram = {
+        f"{i * HISTOGRAM_WIDTH}-{(i + 1) * HISTOGRAM_WIDTH}": count for i, count in enumerate(buckets)
+    }
+
+    return {
+        'attempts': attempts,
+        'mean_percentage': round(sum(p * c for p, c in value_counts) / attempts, 2) if attempts else 0.0,
+        'percentiles': {f"p{pct}": weighted_percentile(value_counts, attempts, pct) for pct in PERCENTILES},
+        'histogram': histogram,
+    }
+
+
+def top_players(cursor, top):
+    """Best attempt of the top players, read in order from player_best"""
+    cursor.execute('''
+        SELECT p.name, b.percentage
+        FROM player_best b
+        JOIN players p ON b.player_id = p.id
+        ORDER BY b.percentage DESC, b.score DESC, b.quiz_date DESC
+        LIMIT ?
+    ''', (top,))
+    return [{'name': name, 'percentage': percentage} for name, percentage in cursor.fetchall()]
+
+
+STATISTICS = [
+    ('questions', question_stats),
+    ('players', player_stats),
+    ('scores', score_stats),
+    ('top_players', top_players),
+]
+
+
+def compute_statistics(conn, top=3):
+    """Return {'statistics': {name: value}, 'timings_ms': {name: ms}}"""
+    report = {'statistics': {}, 'timings_ms': {}}
+    cursor = conn.cursor()
+    for name, compute in STATISTICS:
+        started = time.perf_counter()
+        report['statistics'][name] = compute(cursor, top)
+        report['timings_ms'][name] = round((time.perf_counter() - started) * 1000, 3)
+    return report
+
+
+def format_statistics(report):
+    """Render a report as the viewer's text output"""
+    stats = report['statistics']
+    timings = report['timings_ms']
+    questions, players, scores = stats['questions'], stats['players'], stats['scores']
+
+    lines = ["📈 Quiz Game Statistics:"]
+    lines.append(f"   • Total Questions: {questions['total']}  ({timings['questions']:.1f} ms)")
+    lines.append("   • Questions by Category:")
+    for category, count in questions['by_category'].items():
+        lines.append(f"     - {category}: {count}")
+    lines.append("   • Questions by Difficulty:")
+    for difficulty, count in questions['by_difficulty'].items():
+        lines.append(f"     - {difficulty}: {count}")
+
+    lines.append(f"   • Total Players: {players['total']} ({players['active']} with scores)"
+                 f"  ({timings['players']:.1f} ms)")
+
+    lines.append(f"   • Total Quiz Attempts: {scores['attempts']}  ({timings['scores']:.1f} ms)")
+    if scores['attempts']:
+        lines.append(f"   • Mean Score: {scores['mean_percentage']}%")
+        lines.append("   • Score Percentiles: " +
+                     ", ".join(f"{name} {value}%" for name, value in scores['percentiles'].items()))
+        lines.append("   • Score Distribution:")
+        widest = max(scores['histogram'].values())
+        for bucket, count in scores['histogram'].items():
+            bar = "█" * round(30 * count / widest) if widest else ""
+            lines.append(f"     {bucket:>7}% {count:>9}  {bar}")
+
+    if stats['top_players']:
+        lines.append(f"   • Top {len(stats['top_players'])} Players:  ({timings['top_players']:.1f} ms)")
+        for i, player in enumerate(stats['top_players'], 1):
+            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
+            lines.append(f"     {medal} {player['name']}: {player['percentage']}%")
+
+    lines.append(f"   • Computed in {sum(timings.values()):.1f} ms")
+    return "\n".join(lines)
+
@@ -0,0 +1,146 @@
+import threading
+from array import array
+
+# Best percentages are stored rounded to 2 decimals, so 0.00-100.00 maps onto
+# 10001 integer buckets
+BUCKETS = 10001
+
+
+def percentage_bucket(percentage):
+    """Bucket index of a stored percentage"""
+    return min(max(int(round(percentage * 100)), 0), BUCKETS - 1)
+
+
+def rank_and_percentile(above, total):
+    """(rank, total, percentile) for a player with ``above`` players ahead of them
+
+    Players with the same best percentage share a rank. The percentile is the
+    share of ranked players at or below this one, so the leader is at 100.
+    """
+    return above + 1, total, round((total - above) * 100.0 / total, 2)
+
+
+class FenwickTree:
+    """Binary indexed tree of counts: O(log n) point updates and prefix sums"""
+
+    __slots__ = ('size', 'tree', 'total')
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = array('q', bytes(8 * (size + 1)))
+        self.total = 0
+
+    @classmethod
+    def from_counts(cls, counts):
+        """Build from a list of per-index counts in O(n)"""
+        fenwick = cls(len(counts))
+        tree = fenwick.tree
+        for i, count in enumerate(counts, 1):
+            tree[i] += count
+            parent = i + (i & -i)
+            if parent <= fenwick.size:
+                tree[parent] += tree[i]
+        fenwick.total = sum(counts)
+        return fenwick
+
+    def add(self, index, delta):
+        """Add ``delta`` to the count at ``index``"""
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, index):
+        """Sum of the counts at 0..``index`` inclusive"""
+        result = 0
+        i = min(index + 1, self.size)
+        while i > 0:
+            result += self.tree[i]
+            i -= i & -i
+        return result
+
+
+class RankIndex:
+    """Order-statistic index over every player's best percentage
+
+    Holds one count per percentage bucket in a Fenwick tree, plus each
+    player's current bucket, so a rank is one prefix sum over the 10001
+    buckets (14 steps) however many scores and players there are. New bests
+    are picked up before each lookup by reading the ``player_best`` rows
+    whose ``score_id`` is past the last one seen: an index range read that
+    also sees other processes' writes. Call ``invalidate()`` after
+    rebuilding ``player_best``.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self._tree = None
+        self._buckets = array('H')   # player id -> bucket + 1, 0 = no score
+        self._last_score_id = 0
+
+    def invalidate(self):
+        """Rebuild from scratch on the next lookup"""
+        with self._lock:
+            self._tree = None
+
+    def rank(self, player_id):
+        """Return (rank, players ranked, percentile) for a player id, or None if unranked"""
+        with self._lock:
+            self._refresh()
+            bucket = self._bucket_of(player_id)
+            if bucket is None:
+                return None
+            total = self._tree.total
+            above = total - self._tree.prefix_sum(bucket)
+        return rank_and_percentile(above, total)
+
+    def standing(self, percentage):
+        """Return (players with a higher best percentage, players ranked)"""
+        with self._lock:
+            self._refresh()
+            total = self._tree.total
+            return total - self._tree.prefix_sum(percentage_bucket(percentage)), total
+
+    def _bucket_of(self, player_id):
+        if player_id >= len(self._buckets) or not self._buckets[player_id]:
+            return None
+        return self._buckets[player_id] - 1
+
+    def _set_bucket(self, player_id, bucket):
+        if player_id >= len(self._buckets):
+            self._buckets.frombytes(bytes(self._buckets.itemsize * (player_id + 1 - len(self._buckets))))
+        self._buckets[player_id] = bucket + 1
+
+    def _refresh(self):
+        if self._tree is None:
+            self._build()
+            return
+        with self.db.connection() as conn:
+            rows = conn.execute('''
+                SELECT player_id, percentage, score_id FROM player_best
+                WHERE score_id > ? ORDER BY score_id
+            ''', (self._last_score_id,)).fetchall()
+        for player_id, percentage, score_id in rows:
+            old = self._bucket_of(player_id)
+            new = percentage_bucket(percentage)
+            if old is not None:
+                self._tree.add(old, -1)
+            self._tree.add(new, 1)
+            self._set_bucket(player_id, new)
+            self._last_score_id = score_id
+
+    def _build(self):
+        counts = [0] * BUCKETS
+        self._buckets = array('H')
+        with self.db.connection() as conn:
+            self._last_score_id = conn.execute(
+                "SELECT COALESCE(MAX(score_id), 0) FROM player_best").fetchone()[0]
+            cursor = conn.execute("SELECT player_id, percentage FROM player_best WHERE score_id <= ?",
+                                  (self._last_score_id,))
+            for player_id, percentage in cursor:
+                bucket = percentage_bucket(percentage)
+                counts[bucket] += 1
+                self._set_bucket(player_id, bucket)
+        self._tree = FenwickTree.from_counts(counts)
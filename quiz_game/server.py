@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Multi-player Quiz Game server
+Serves many concurrent quiz sessions over a line-based TCP protocol. All
+SQLite work runs on a bounded thread pool so the event loop never blocks.
+
+Usage:
+    python server.py [--host 127.0.0.1] [--port 8765] [--db-workers 4] [--write-behind] [--answer-log]
+    python server.py --db :memory: --load quiz_game.db --snapshot tournament.db
+    python server.py --pack tournament.qpk
+
+Protocol (one UTF-8 line per message, fields separated by tabs):
+
+    client                      server
+    ------                      ------
+                                WELCOME <text>
+    NAME <name>                 OK <player id>
+    PLAY [count]                QUESTION <n>/<total> <category> <difficulty> <text> <A> <B> <C> <D>
+    ANSWER <A|B|C|D>            RESULT <CORRECT|INCORRECT> <correct letter> <score>/<answered>
+                                then the next QUESTION, or
+                                FINISHED <score> <total> <percentage>
+    LEADERBOARD [count]         LEADER <rank> <name> <score>/<total> <percentage> ... END
+    MENU                        MENU NAME <name> | PLAY [count] | LEADERBOARD [count] | QUIT
+    QUIT                        BYE
+
+Any problem is reported as ERROR <message> and the connection stays open.
+"""
+
+import argparse
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from database import default_location
+from sharding import configured_shards, open_database
+from session import SessionManager, SessionError
+from write_behind import ScoreWriter
+from answer_log import AnswerLogger
+
+MAX_LINE = 4096
+MAX_QUESTIONS = 50
+MENU = "MENU\tNAME <name> | PLAY [count] | LEADERBOARD [count] | QUIT"
+
+
+def clean(value):
+    """Make a value safe to put in a tab-separated protocol line"""
+    return " ".join(str(value).split())
+
+
+def format_question(session):
+    question = session.current_question
+    fields = [
+        f"{session.question_number}/{len(session.quiz.questions)}",
+        question.category, question.difficulty, question.text,
+        *(question.get_option(key) for key in ('A', 'B', 'C', 'D')),
+    ]
+    return "QUESTION\t" + "\t".join(clean(field) for field in fields)
+
+
+class QuizServer:
+    """asyncio TCP server hosting one quiz session per connection"""
+
+    def __init__(self, db, host='127.0.0.1', port=8765, db_workers=4, score_writer=None, answer_log=None,
+                 pack=None):
+        self.db = db
+        self.score_writer = score_writer
+        self.sessions = SessionManager(db, score_writer.save_score if score_writer else None,
+                                       answer_log=answer_log, pack=pack)
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix='quiz-db')
+        self.server = None
+        self.connections = 0
+
+    async def run_db(self, func, *args, **kwargs):
+        """Run a blocking database call on the bounded executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=MAX_LINE)
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.executor.shutdown(wait=True)
+
+    async def handle_client(self, reader, writer):
+        self.connections += 1
+        client = ClientHandler(self, reader, writer)
+        try:
+            await client.run()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await client.abandon()
+            self.connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+class ClientHandler:
+    """Protocol state for a single connection"""
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.player_name = None
+        self.session = None
+
+    async def send(self, line):
+        self.writer.write(line.encode('utf-8') + b"\n")
+        await self.writer.drain()
+
+    async def run(self):
+        await self.send("WELCOME\tQuiz Game server")
+        await self.send(MENU)
+        while True:
+            try:
+                raw = await self.reader.readline()
+            except ValueError:
+                await self.send("ERROR\tLine too long")
+                continue
+            if not raw:
+                return
+            command, _, argument = raw.decode('utf-8', 'replace').strip().partition(" ")
+            command = command.upper()
+            argument = argument.strip()
+
+            if command == 'QUIT':
+                await self.send("BYE")
+                return
+            handler = getattr(self, f"do_{command.lower()}", None)
+            if handler is None:
+                await self.send(f"ERROR\tUnknown command {clean(command)!r}")
+                continue
+            try:
+                await handler(argument)
+            except (ValueError, SessionError) as e:
+                await self.send(f"ERROR\t{clean(e)}")
+
+    async def do_menu(self, argument):
+        await self.send(MENU)
+
+    async def do_name(self, argument):
+        if not argument:
+            raise ValueError("Usage: NAME <name>")
+        if self.session is not None:
+            raise ValueError("Finish the current quiz first")
+        player_id = await self.server.run_db(self.server.db.add_player, argument)
+        self.player_name = argument
+        await self.send(f"OK\t{player_id}")
+
+    async def do_play(self, argument):
+        if self.player_name is None:
+            raise ValueError("Send NAME <name> first")
+        if self.session is not None:
+            raise ValueError("A quiz is already in progress")
+        count = int(argument) if argument else 5
+        if not 1 <= count <= MAX_QUESTIONS:
+            raise ValueError(f"Question count must be between 1 and {MAX_QUESTIONS}")
+
+        self.session = await self.server.run_db(self.server.sessions.start_session, self.player_name, count)
+        await self.send(format_question(self.session))
+
+    async def do_answer(self, argument):
+        if self.session is None:
+            raise ValueError("No quiz in progress; send PLAY")
+        result = self.session.submit_answer(argument)
+        verdict = "CORRECT" if result.is_correct else "INCORRECT"
+        await self.send(f"RESULT\t{verdict}\t{result.correct_answer}\t{result.score}/{result.answered}")
+
+        if not result.finished:
+            await self.send(format_question(self.session))
+            return
+
+        session, self.session = self.session, None
+        summary = await self.server.run_db(self.server.sessions.finish, session.id)
+        await self.send(f"FINISHED\t{summary.score}\t{summary.total_questions}\t{summary.percentage}")
+
+    async def do_leaderboard(self, argument):
+        limit = int(argument) if argument else 10
+        rows = await self.server.run_db(self.server.db.get_leaderboard, min(max(limit, 1), 100))
+        for rank, (name, score, total, date, percentage) in enumerate(rows, 1):
+            await self.send(f"LEADER\t{rank}\t{clean(name)}\t{score}/{total}\t{percentage}")
+        await self.send("END")
+
+    async def abandon(self):
+        """Drop an unfinished session when the client disconnects"""
+        if self.session is not None:
+            session, self.session = self.session, None
+            await self.server.run_db(self.server.sessions.finish, session.id, save=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--db-workers', type=int, default=4, help="threads available for SQLite calls")
+    parser.add_argument('--write-behind', action='store_true', help="batch score inserts in the background")
+    parser.add_argument('--batch-size', type=int, default=100, help="scores per write-behind flush")
+    parser.add_argument('--flush-interval', type=float, default=1.0, help="max seconds a score waits to be flushed")
+    parser.add_argument('--answer-log', action='store_true', help="record every answer in the answers table")
+    parser.add_argument('--db', default=default_location(),
+                        help="database file, file: URI or :memory: (default QUIZ_GAME_DB or quiz_game.db)")
+    parser.add_argument('--load', help="copy this database file in before serving")
+    parser.add_argument('--snapshot', help="back the database up to this file on shutdown")
+    parser.add_argument('--pack', help="serve every quiz from this quiz pack (see quiz_pack.py)")
+    args = parser.parse_args()
+    if (args.load or args.snapshot) and configured_shards() > 1:
+        parser.error("--load and --snapshot work on a single database file; unset QUIZ_GAME_SHARDS to use them")
+
+    options = {'load_from': args.load} if args.load else {}
+    db = open_database(args.db, pool_size=args.db_workers + 1, **options)
+    score_writer = ScoreWriter(db, args.batch_size, args.flush_interval) if args.write_behind else None
+    answer_log = AnswerLogger(db) if args.answer_log else None
+    pack = None
+    if args.pack:
+        from quiz_pack import open_pack
+        pack = open_pack(args.pack)
+    server = QuizServer(db, args.host, args.port, args.db_workers, score_writer, answer_log, pack)
+
+    print(f"Quiz server listening on {args.host}:{args.port} ({args.db_workers} database workers)")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+    finally:
+        server.close()
+        if score_writer:
+            score_writer.close()
+            print(f"Score writer: {score_writer.metrics()}")
+        if answer_log:
+            answer_log.close()
+            print(f"Answer log: {answer_log.metrics()}")
+        if args.snapshot:
+            db.snapshot(args.snapshot)
+            print(f"Snapshot written to {args.snapshot}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import itertools
+import threading
+import time
+from collections import namedtuple
+
+from models import Player, Quiz
+
+VALID_ANSWERS = ('A', 'B', 'C', 'D')
+
+AnswerResult = namedtuple('AnswerResult', [
+    'question_id', 'answer', 'is_correct', 'correct_answer', 'correct_text',
+    'score', 'answered', 'finished',
+])
+
+SessionResult = namedtuple('SessionResult', [
+    'session_id', 'player_name', 'player_id', 'score', 'total_questions',
+    'percentage', 'duration', 'saved',
+])
+
+
+class SessionError(Exception):
+    """Raised when a session is unknown or used out of order"""
+
+
+class QuizSession:
+    """A single player's quiz in progress, with no console I/O"""
+
+    __slots__ = ('id', 'player', 'quiz', 'result', 'on_answer', 'presented_at')
+
+    def __init__(self, session_id, player, quiz, on_answer=None):
+        self.id = session_id
+        self.player = player
+        self.quiz = quiz
+        self.result = None
+        # Called as on_answer(player, question_id, answer, is_correct, response_ms)
+        self.on_answer = on_answer
+
+        self.player.reset_score()
+        self.quiz.start_quiz()
+        self.presented_at = time.monotonic()
+
+    def mark_presented(self):
+        """Start timing the current question's response from now"""
+        self.presented_at = time.monotonic()
+
+    @property
+    def is_finished(self):
+        return self.result is not None or not self.quiz.has_next_question()
+
+    @property
+    def current_question(self):
+        """The question waiting for an answer, or None when all are answered"""
+        return self.quiz.get_current_question()
+
+    @property
+    def question_number(self):
+        """1-based position of the current question"""
+        return self.quiz.current_question_index + 1
+
+    def submit_answer(self, answer):
+        """Answer the current question and return an AnswerResult"""
+        if self.result is not None:
+            raise SessionError(f"Session {self.id} is already finished")
+        question = self.quiz.get_current_question()
+        if question is None:
+            raise SessionError(f"Session {self.id} has no questions left")
+
+        answer = (answer or '').strip().upper()
+        if answer not in VALID_ANSWERS:
+            raise ValueError("Answer must be A, B, C or D")
+
+        response_ms = int((time.monotonic() - self.presented_at) * 1000)
+        is_correct = self.quiz.answer_current_question(self.player, answer)
+        self.presented_at = time.monotonic()
+        if self.on_answer is not None:
+            self.on_answer(self.player, question.id, answer, is_correct, response_ms)
+        return AnswerResult(
+            question_id=question.id,
+            answer=answer,
+            is_correct=is_correct,
+            correct_answer=question.correct_answer,
+            correct_text=question.get_option(question.correct_answer),
+            score=self.player.current_score,
+            answered=self.player.total_questions_answered,
+            finished=not self.quiz.has_next_question(),
+        )
+
+    def finish(self, save_score=None):
+        """Close the session and return its SessionResult
+
+        ``save_score(player_id, score, total)`` is called once if given and at
+        least one question was answered. Finishing twice returns the same result.
+        """
+        if self.result is not None:
+            return self.result
+
+        if not self.quiz.is_completed:
+            self.quiz.complete_quiz()
+
+        saved = False
+        if save_score is not None and self.player.total_questions_answered:
+            save_score(self.player.id, self.player.current_score, self.player.total_questions_answered)
+            saved = True
+
+        self.result = SessionResult(
+            session_id=self.id,
+            player_name=self.player.name,
+            player_id=self.player.id,
+            score=self.player.current_score,
+            total_questions=self.player.total_questions_answered,
+            percentage=self.player.get_percentage(),
+            duration=self.quiz.get_duration(),
+            saved=saved,
+        )
+        return self.result
+
+
+class SessionManager:
+    """Runs any number of concurrent quiz sessions against one Database
+
+    This is the headless game API: ``start_session``, ``submit_answer`` and
+    ``finish`` return structured results and never touch the console, so the
+    console UI, the network server and tests all drive the same code.
+    """
+
+    def __init__(self, db, save_score=None, selector=None, answer_log=None, pack=None):
+        self.db = db
+        self.save_score = save_score or db.save_score
+        # Optional AdaptiveSelector used for unfiltered quizzes of known players
+        self.selector = selector
+        # Optional AnswerLogger that records every answer
+        self.answer_log = answer_log
+        # Optional QuizPack that every quiz is drawn from instead of the database
+        self.pack = pack
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create_quiz(self, num_questions=5, category=None, difficulty=None, player=None):
+        """Build a shuffled Quiz of random questions, or None if there are none
+
+        With a quiz pack, questions come from the pack only. Otherwise, with an
+        adaptive selector and a ``player``, an unfiltered quiz is drawn to
+        match the player's recent accuracy instead of uniformly.
+        """
+        if self.pack is not None:
+            quiz = Quiz.from_pack(self.pack, num_questions, category, difficulty)
+            return quiz if quiz.questions else None
+        if self.selector is not None and player is not None and category is None and difficulty is None:
+            accuracy = self.selector.player_accuracy(player.name)
+            questions = self.selector.sample(num_questions, accuracy)
+        else:
+            questions = self.db.question_cache.sample(num_questions, category=category, difficulty=difficulty)
+        if not questions:
+            return None
+        quiz = Quiz(questions)
+        quiz.shuffle_questions()
+        return quiz
+
+    def start_session(self, player, num_questions=5, category=None, difficulty=None, quiz=None):
+        """Start a session for a Player (or a player name) and return it
+
+        A prepared ``quiz`` is used as-is; otherwise one is drawn from the database.
+        """
+        if not isinstance(player, Player):
+            name = str(player).strip()
+            if not name:
+                raise ValueError("Player name cannot be empty")
+            player = Player(name, self.db.add_player(name))
+
+        if quiz is None:
+            quiz = self.create_quiz(num_questions, category, difficulty, player)
+            if quiz is None:
+                raise SessionError("No questions available in the database")
+
+        with self._lock:
+            on_answer = self._on_answer if self.selector or self.answer_log else None
+            session = QuizSession(next(self._ids), player, quiz, on_answer)
+            self.sessions[session.id] = session
+        return session
+
+    def _on_answer(self, player, question_id, answer, is_correct, response_ms):
+        if self.selector is not None:
+            self.selector.record_answer(question_id, is_correct)
+        if self.answer_log is not None:
+            self.answer_log.log(player.id, question_id, answer, is_correct, response_ms)
+
+    def get_session(self, session_id):
+        """Look up a live session by id"""
+        try:
+            return self.sessions[session_id]
+        except KeyError:
+            raise SessionError(f"Unknown session {session_id}") from None
+
+    def submit_answer(self, session_id, answer):
+        """Answer the current question of a session"""
+        return self.get_session(session_id).submit_answer(answer)
+
+    def finish(self, session_id, save=True):
+        """Finish a session, optionally saving its score, and forget it"""
+        session = self.get_session(session_id)
+        result = session.finish(self.save_score if save else None)
+        with self._lock:
+            self.sessions.pop(session_id, None)
+        return result
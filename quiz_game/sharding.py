@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Sharded player/score storage for the Quiz Game
+Players and their scores are spread over N SQLite files so writers do not
+all queue on one file lock; questions stay in the shared database file.
+
+Usage:
+    python sharding.py status [--shards 4]
+    python sharding.py reshard --shards 4 [--from-shards 1] [--batch-size 500]
+
+With QUIZ_GAME_SHARDS=N the game and the server use N shard files named
+quiz_game.shard<i>of<N>.db next to quiz_game.db. Resharding copies players
+and scores into a new set of shard files and leaves the source files
+untouched, except that the answer log in quiz_game.db is rewritten to the
+players' new ids once the copy succeeds.
+"""
+
+import heapq
+import itertools
+import os
+import sys
+import zlib
+
+from connection_pool import is_memory, is_uri
+from database import Database, default_location
+from ranking import rank_and_percentile
+
+
+def shard_paths(db_path, count):
+    """File names of the ``count`` shards that belong to ``db_path``"""
+    root, ext = os.path.splitext(db_path)
+    return [f"{root}.shard{i}of{count}{ext or '.db'}" for i in range(count)]
+
+
+def shard_for_name(name, count):
+    """Stable shard index for a player name"""
+    return zlib.crc32(name.encode('utf-8')) % count
+
+
+class ShardedDatabase:
+    """Database-compatible front end over one questions file and N shard files
+
+    A player lives on the shard chosen by a hash of their name. Their global
+    id is ``local_id * N + shard``, so any method taking a player id can find
+    the shard without a lookup. Question methods, ``connection()`` and the
+    question cache all use the shared questions file; shard files only get
+    the players and scores schema.
+    """
+
+    def __init__(self, db_path=None, shards=2, pool_size=5, pragmas=None):
+        if shards < 1:
+            raise ValueError("Need at least one shard")
+        self.db_path = db_path or default_location()
+        if is_uri(self.db_path) or is_memory(self.db_path):
+            raise ValueError("Sharding needs a database file path, not a URI or in-memory database")
+        self.questions = Database(self.db_path, pool_size=pool_size, pragmas=pragmas)
+        self.shards = [Database(path, pool_size=pool_size, pragmas=pragmas, shard=True)
+                       for path in shard_paths(self.db_path, shards)]
+        self.sampler = self.questions.sampler
+        self.question_cache = self.questions.question_cache
+
+    @property
+    def shard_count(self):
+        return len(self.shards)
+
+    def _split(self, player_id):
+        """Return (shard Database, local id) for a global player id"""
+        return self.shards[player_id % self.shard_count], player_id // self.shard_count
+
+    def _by_name(self, player_name):
+        return self.shards[shard_for_name(player_name, self.shard_count)]
+
+    # Questions and everything keyed by question live in the shared file
+
+    def connection(self):
+        """Pooled connection to the shared questions file"""
+        return self.questions.connection()
+
+    @property
+    def instrumentation(self):
+        return self.questions.instrumentation
+
+    def init_database(self):
+        """Bring the questions file and every shard up to the current schema"""
+        self.questions.init_database()
+        for shard in self.shards:
+            shard.init_database()
+
+    def add_sample_questions(self):
+        return self.questions.add_sample_questions()
+
+    def add_question(self, *args, **kwargs):
+        return self.questions.add_question(*args, **kwargs)
+
+    def add_questions(self, rows):
+        return self.questions.add_questions(rows)
+
+    def find_existing_questions(self, texts):
+        return self.questions.find_existing_questions(texts)
+
+    def search_questions(self, terms, limit=20):
+        return self.questions.search_questions(terms, limit)
+
+    def get_random_questions(self, count=5, category=None, difficulty=None):
+        return self.questions.get_random_questions(count, category, difficulty)
+
+    def save_question_stats(self, rows):
+        return self.questions.save_question_stats(rows)
+
+    def save_answers(self, rows):
+        return self.questions.save_answers(rows)
+
+    # Players and scores are routed to their shard
+
+    def add_player(self, name):
+        """Add a new player or get an existing player's global id"""
+        shard = shard_for_name(name, self.shard_count)
+        return self.shards[shard].add_player(name) * self.shard_count + shard
+
+    def save_score(self, player_id, score, total_questions):
+        shard, local_id = self._split(player_id)
+        shard.save_score(local_id, score, total_questions)
+
+    def save_scores(self, rows):
+        """Save (player_id, score, total_questions[, quiz_date]) rows, one transaction per shard"""
+        grouped = {}
+        for player_id, *rest in rows:
+            shard, local_id = self._split(player_id)
+            grouped.setdefault(id(shard), (shard, []))[1].append((local_id, *rest))
+        for shard, shard_rows in grouped.values():
+            shard.save_scores(shard_rows)
+
+    def get_leaderboard(self, limit=10, best_per_player=False):
+        """k-way merge of every shard's top ``limit`` rows"""
+        per_shard = [shard.get_leaderboard(limit, best_per_player) for shard in self.shards]
+        # Each list is already ordered by (percentage, score, quiz_date) descending
+        merged = heapq.merge(*per_shard, key=lambda row: (row[4], row[1], row[3]), reverse=True)
+        return list(itertools.islice(merged, limit))
+
+    def get_player_rank(self, player_name):
+        """Rank across all shards: sum each shard's count of better players"""
+        stats = self.get_player_stats(player_name)
+        if stats is None:
+            return None
+        best_percentage = stats[4]
+        above = total = 0
+        for shard in self.shards:
+            shard_above, shard_total = shard.rank_index.standing(best_percentage)
+            above += shard_above
+            total += shard_total
+        return rank_and_percentile(above, total)
+
+    def get_period_leaderboard(self, period, limit=10, bucket=None):
+        """k-way merge of every shard's top ``limit`` rows for one period"""
+        per_shard = [shard.get_period_leaderboard(period, limit, bucket) for shard in self.shards]
+        merged = heapq.merge(*per_shard, key=lambda row: (row[4], row[1], row[3]), reverse=True)
+        return list(itertools.islice(merged, limit))
+
+    def backfill_period_leaderboards(self, batch_size=10000):
+        return sum(shard.backfill_period_leaderboards(batch_size) for shard in self.shards)
+
+    def get_player_history(self, player_name):
+        return self._by_name(player_name).get_player_history(player_name)
+
+    def get_player_history_page(self, player_name, page_size=20, after=None):
+        return self._by_name(player_name).get_player_history_page(player_name, page_size, after)
+
+    def get_player_stats(self, player_name):
+        return self._by_name(player_name).get_player_stats(player_name)
+
+    def rebuild_leaderboard(self):
+        for shard in self.shards:
+            shard.rebuild_leaderboard()
+
+    def check_leaderboard(self, limit=100):
+        problems = []
+        for index, shard in enumerate(self.shards):
+            problems.extend(f"shard {index}: {problem}" for problem in shard.check_leaderboard(limit))
+        return problems
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+        self.questions.close()
+
+
+def configured_shards():
+    """Shard count from the QUIZ_GAME_SHARDS environment variable (1 = unsharded)"""
+    return int(os.environ.get('QUIZ_GAME_SHARDS') or 1)
+
+
+def open_database(db_path=None, shards=None, **kwargs):
+    """Open a Database, or a ShardedDatabase when more than one shard is configured
+
+    ``shards`` defaults to the QUIZ_GAME_SHARDS environment variable.
+    """
+    if shards is None:
+        shards = configured_shards()
+    if shards > 1:
+        return ShardedDatabase(db_path, shards, **kwargs)
+    return Database(db_path, **kwargs)
+
+
+def source_shards(db_path, count):
+    """The Database objects holding players and scores for a layout of ``count`` shards"""
+    if count <= 1:
+        return [Database(db_path)]
+    return [Database(path, shard=True) for path in shard_paths(db_path, count)]
+
+
+def reshard(db_path, from_shards, to_shards, batch_size=500):
+    """Copy every player and score into a fresh set of ``to_shards`` shard files
+
+    Players keep their names and creation times and scores keep their dates;
+    the best-score and per-player stats tables are rebuilt as the scores are
+    written. Global player ids change with the shard count, so the answer
+    log in the shared file is then remapped to the new ids in one
+    transaction. Returns (players copied, scores copied).
+    """
+    if to_shards < 2:
+        raise ValueError("Resharding needs at least two target shards")
+    targets = shard_paths(db_path, to_shards)
+    existing = [path for path in targets if os.path.exists(path)]
+    if existing:
+        raise FileExistsError(f"Target shard files already exist: {', '.join(existing)}")
+    if from_shards == to_shards:
+        raise ValueError("Source and target shard counts are the same")
+
+    destination = [Database(path, shard=True) for path in targets]
+    id_map = []
+    players = scores = 0
+    try:
+        for index, source in enumerate(source_shards(db_path, from_shards)):
+            try:
+                copied = _copy_shard(source, destination, batch_size, index, max(from_shards, 1), id_map)
+            finally:
+                source.close()
+            players += copied[0]
+            scores += copied[1]
+    finally:
+        for shard in destination:
+            shard.close()
+    _remap_answers(db_path, id_map)
+    return players, scores
+
+
+def _remap_answers(db_path, id_map):
+    """Point logged answers at the players' new global ids
+
+    ``id_map`` holds (old id, new id) pairs. Answers by a player that was not
+    copied lose their player id rather than pointing at someone else.
+    """
+    main = Database(db_path)
+    try:
+        with main.connection() as conn:
+            conn.execute("CREATE TEMP TABLE player_id_remap (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)")
+            try:
+                conn.executemany("INSERT INTO temp.player_id_remap VALUES (?, ?)", id_map)
+                conn.execute('''
+                    UPDATE answers SET player_id = (
+                        SELECT new_id FROM temp.player_id_remap WHERE old_id = answers.player_id
+                    )
+                    WHERE player_id IS NOT NULL
+                ''')
+            finally:
+                conn.execute("DROP TABLE temp.player_id_remap")
+    finally:
+        main.close()
+
+
+def _copy_shard(source, destination, batch_size, source_index=0, source_count=1, id_map=None):
+    """Copy one source file's players and scores in keyset-paged batches
+
+    Appends (old global id, new global id) for each player to ``id_map``.
+    """
+    players = scores = 0
+    after = 0
+    while True:
+        with source.connection() as conn:
+            batch = conn.execute(
+                "SELECT id, name, created_at FROM players WHERE id > ? ORDER BY id LIMIT ?",
+                (after, batch_size),
+            ).fetchall()
+            if not batch:
+                return players, scores
+            placeholders = ",".join("?" * len(batch))
+            score_rows = conn.execute(f'''
+                SELECT player_id, score, total_questions, quiz_date FROM scores
+                WHERE player_id IN ({placeholders}) ORDER BY id
+            ''', [row[0] for row in batch]).fetchall()
+
+        by_player = {}
+        for player_id, score, total, quiz_date in score_rows:
+            by_player.setdefault(player_id, []).append((score, total, quiz_date))
+
+        grouped = {}
+        for player_id, name, created_at in batch:
+            grouped.setdefault(shard_for_name(name, len(destination)), []).append((player_id, name, created_at))
+
+        for index, shard_players in grouped.items():
+            target = destination[index]
+            with target.connection() as conn:
+                rows = []
+                for player_id, name, created_at in shard_players:
+                    cursor = conn.execute(
+                        "INSERT INTO players (name, created_at) VALUES (?, COALESCE(?, CURRENT_TIMESTAMP))",
+                        (name, created_at),
+                    )
+                    rows.extend((cursor.lastrowid, *score) for score in by_player.get(player_id, ()))
+                    if id_map is not None:
+                        id_map.append((player_id * source_count + source_index,
+                                       cursor.lastrowid * len(destination) + index))
+                target.save_scores(rows)
+            players += len(shard_players)
+            scores += len(rows)
+        after = batch[-1][0]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['status', 'reshard'])
+    parser.add_argument('--db', default=default_location(), help="shared questions database")
+    parser.add_argument('--shards', type=int, default=configured_shards(),
+                        help="shard count to inspect, or to reshard into")
+    parser.add_argument('--from-shards', type=int, default=1, help="current shard count (1 = unsharded)")
+    parser.add_argument('--batch-size', type=int, default=500, help="players copied per transaction")
+    args = parser.parse_args()
+
+    if args.command == 'reshard':
+        try:
+            players, scores = reshard(args.db, args.from_shards, args.shards, args.batch_size)
+        except (FileExistsError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"✅ Copied {players} players and {scores} scores into {args.shards} shards.")
+        print(f"   Start the game with QUIZ_GAME_SHARDS={args.shards} to use them.")
+        return 0
+
+    for index, source in enumerate(source_shards(args.db, args.shards)):
+        try:
+            with source.connection() as conn:
+                players = conn.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+                scores = conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        finally:
+            source.close()
+        print(f"  shard {index}: {players} players, {scores} scores  ({source.db_path})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
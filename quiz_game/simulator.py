@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Multi-process load simulator for the Quiz Game database
+Spawns a pool of worker processes; each plays automated bot quizzes through
+the same add_player / create_quiz / answer_current_question / save_score
+calls the console game uses, against one shared SQLite file. Reports
+throughput, "database is locked" errors and per-operation latency percentiles.
+
+Usage:
+    python simulator.py [--processes 4] [--bots 100] [--quizzes 5] [--questions 5]
+                        [--accuracy 0.6] [--think-time 0.0] [--db load.db] [--shards 1]
+                        [--pack tournament.qpk]
+    python simulator.py --busy-timeout 0   # surface lock contention instead of waiting
+
+Without --db the bots play against a fresh database in a temporary
+directory that is deleted afterwards, so a casual run never touches the
+real quiz_game.db and its leaderboard.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from metrics import summarize
+
+OPERATIONS = ('add_player', 'create_quiz', 'answer', 'save_score', 'quiz')
+
+# Per-process state, set up by init_worker
+_worker = {}
+
+
+def init_worker(db_path, busy_timeout, shards, pack_path=None):
+    """Open this process's Database, quiz pack and session manager"""
+    from session import SessionManager
+    from sharding import open_database
+
+    pragmas = {'busy_timeout': busy_timeout} if busy_timeout is not None else None
+    db = open_database(db_path, shards, pool_size=1, pragmas=pragmas)
+    pack = None
+    if pack_path:
+        # Every worker maps the same file, so they share its pages
+        from quiz_pack import open_pack
+        pack = open_pack(pack_path)
+    _worker['db'] = db
+    _worker['sessions'] = SessionManager(db, pack=pack)
+
+
+def is_lock_error(error):
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def timed(latencies, name, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    latencies[name].append((time.perf_counter() - started) * 1000)
+    return result
+
+
+def run_bot(task):
+    """Play ``quizzes`` quizzes as one bot; return its latencies and error counts"""
+    from models import Player
+
+    bot_id, quizzes, questions, accuracy, think_time, seed = task
+    db = _worker['db']
+    sessions = _worker['sessions']
+    rng = random.Random(seed)
+    latencies = {name: [] for name in OPERATIONS}
+    result = {'latencies': latencies, 'quizzes': 0, 'answers': 0, 'locked': 0, 'errors': 0}
+
+    name = f"sim-bot-{bot_id}"
+    try:
+        player = Player(name, timed(latencies, 'add_player', db.add_player, name))
+    except sqlite3.OperationalError as e:
+        result['locked' if is_lock_error(e) else 'errors'] += 1
+        return result
+
+    for _ in range(quizzes):
+        started = time.perf_counter()
+        try:
+            quiz = timed(latencies, 'create_quiz', sessions.create_quiz, questions)
+            if quiz is None:
+                result['errors'] += 1
+                return result
+            player.reset_score()
+            quiz.start_quiz()
+            while quiz.has_next_question():
+                if think_time:
+                    time.sleep(think_time * rng.random())
+                question = quiz.get_current_question()
+                if rng.random() < accuracy:
+                    answer = question.correct_answer
+                else:
+                    answer = rng.choice([key for key in 'ABCD' if key != question.correct_answer])
+                timed(latencies, 'answer', quiz.answer_current_question, player, answer)
+                result['answers'] += 1
+            timed(latencies, 'save_score', db.save_score,
+                  player.id, player.current_score, player.total_questions_answered)
+        except sqlite3.OperationalError as e:
+            result['locked' if is_lock_error(e) else 'errors'] += 1
+            continue
+        latencies['quiz'].append((time.perf_counter() - started) * 1000)
+        result['quizzes'] += 1
+    return result
+
+
+def merge(results):
+    """Combine per-bot results into totals and one latency list per operation"""
+    total = {'latencies': {name: [] for name in OPERATIONS}, 'quizzes': 0, 'answers': 0,
+             'locked': 0, 'errors': 0, 'bots': 0}
+    for result in results:
+        total['bots'] += 1
+        for key in ('quizzes', 'answers', 'locked', 'errors'):
+            total[key] += result[key]
+        for name, values in result['latencies'].items():
+            total['latencies'][name].extend(values)
+    return total
+
+
+def simulate(db_path, processes=4, bots=100, quizzes=5, questions=5, accuracy=0.6,
+             think_time=0.0, busy_timeout=None, seed=None, shards=1, pack_path=None):
+    """Run the simulation and return a JSON-friendly report"""
+    from sharding import open_database
+
+    # Migrate (and seed) once here rather than racing in every worker
+    db = open_database(db_path, shards)
+    db.init_database()
+    db.close()
+
+    rng = random.Random(seed)
+    run_id = rng.getrandbits(32)
+    tasks = [(f"{run_id:08x}-{i}", quizzes, questions, accuracy, think_time, rng.getrandbits(64))
+             for i in range(bots)]
+
+    # spawn, so no worker inherits a parent's open SQLite connections
+    context = multiprocessing.get_context('spawn')
+    started = time.perf_counter()
+    with context.Pool(processes, initializer=init_worker, initargs=(db_path, busy_timeout, shards, pack_path)) as pool:
+        total = merge(pool.imap_unordered(run_bot, tasks))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'processes': processes,
+        'shards': shards,
+        'pack': pack_path,
+        'bots': total['bots'],
+        'elapsed_seconds': round(elapsed, 3),
+        'quizzes': total['quizzes'],
+        'answers': total['answers'],
+        'quizzes_per_second': round(total['quizzes'] / elapsed, 1) if elapsed else 0.0,
+        'answers_per_second': round(total['answers'] / elapsed, 1) if elapsed else 0.0,
+        'locked_errors': total['locked'],
+        'other_errors': total['errors'],
+        'latency_ms': {name: summarize(values) for name, values in total['latencies'].items()},
+    }
+
+
+def print_report(report):
+    print(f"\n{report['bots']} bots on {report['processes']} processes, {report['elapsed_seconds']}s")
+    print(f"   Quizzes:  {report['quizzes']:>8}  ({report['quizzes_per_second']}/s)")
+    print(f"   Answers:  {report['answers']:>8}  ({report['answers_per_second']}/s)")
+    print(f"   'database is locked' errors: {report['locked_errors']}")
+    print(f"   Other errors: {report['other_errors']}")
+    print(f"\n   {'Operation':<12} {'count':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, stats in report['latency_ms'].items():
+        print(f"   {name:<12} {stats['count']:>8} {stats['p50']:>9.3f} {stats['p90']:>9.3f} "
+              f"{stats['p99']:>9.3f} {stats['max']:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help="database file to load (default: a throwaway temporary file)")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--bots', type=int, default=100, help="bot players in total")
+    parser.add_argument('--quizzes', type=int, default=5, help="quizzes per bot")
+    parser.add_argument('--questions', type=int, default=5, help="questions per quiz")
+    parser.add_argument('--accuracy', type=float, default=0.6, help="chance a bot answers correctly")
+    parser.add_argument('--think-time', type=float, default=0.0, help="max seconds a bot waits per answer")
+    parser.add_argument('--busy-timeout', type=int, help="override SQLite busy_timeout (ms)")
+    parser.add_argument('--shards', type=int, default=1, help="spread players and scores over N files")
+    parser.add_argument('--pack', help="draw every quiz from this quiz pack")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    scratch = None
+    db_path = args.db
+    if db_path is None:
+        scratch = tempfile.mkdtemp(prefix='quiz-sim-')
+        db_path = os.path.join(scratch, 'load.db')
+    try:
+        report = simulate(db_path, args.processes, args.bots, args.quizzes, args.questions,
+                          args.accuracy, args.think_time, args.busy_timeout, args.seed, args.shards, args.pack)
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 1 if report['other_errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
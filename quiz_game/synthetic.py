@@ -0,0 +1,67 @@
+"""
+Synthetic data generators for benchmarks and load tests
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+CATEGORIES = ["Geography", "Science", "Math", "Literature", "History", "Technology", "Art", "General"]
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+
+def generate_questions(count, seed=None):
+    """Yield ``count`` synthetic question tuples in insert-column order"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield (
+            f"Synthetic question #{i}?",
+            f"Option A{i}", f"Option B{i}", f"Option C{i}", f"Option D{i}",
+            rng.choice("ABCD"),
+            rng.choice(CATEGORIES),
+            rng.choice(DIFFICULTIES),
+        )
+
+
+def fill_questions(db, count, batch_size=10000, seed=None):
+    """Bulk-insert ``count`` synthetic questions into ``db``"""
+    rows = generate_questions(count, seed)
+    with db.connection():
+        while True:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            if not batch:
+                break
+            db.add_questions(batch)
+
+
+def fill_players(db, count, prefix="player"):
+    """Insert ``count`` players named ``<prefix>-<n>`` and return their ids"""
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("INSERT OR IGNORE INTO players (name) VALUES (?)",
+                           ((f"{prefix}-{i}",) for i in range(count)))
+        cursor.execute("SELECT id FROM players WHERE name LIKE ?", (f"{prefix}-%",))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def generate_scores(count, player_ids, quiz_lengths=(5, 10), seed=None, days=365):
+    """Yield (player_id, score, total_questions, age in seconds) rows spread over ``days``"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        total = rng.choice(quiz_lengths)
+        age = rng.randrange(days * 86400)
+        yield (rng.choice(player_ids), rng.randint(0, total), total, age)
+
+
+def fill_scores(db, count, player_ids, batch_size=10000, seed=None, days=365):
+    """Insert ``count`` synthetic scores through ``Database.save_scores``"""
+    now = datetime.now(timezone.utc)
+    rows = generate_scores(count, player_ids, seed=seed, days=days)
+    with db.connection():
+        while True:
+            batch = [
+                (player_id, score, total, (now - timedelta(seconds=age)).strftime('%Y-%m-%d %H:%M:%S'))
+                for _, (player_id, score, total, age) in zip(range(batch_size), rows)
+            ]
+            if not batch:
+                break
+            db.save_scores(batch)
@@ -0,0 +1,28 @@
+from adaptive import AdaptiveSelector, expected_accuracy, target_question_accuracy
+from database import Database
+
+
+def test_target_moves_strong_players_to_harder_questions():
+    assert target_question_accuracy(0.9) < target_question_accuracy(None) < target_question_accuracy(0.3)
+
+
+def test_strong_player_gets_harder_questions_than_weak_player(tmp_path):
+    db = Database(str(tmp_path / "adaptive.db"))
+    selector = AdaptiveSelector(db)
+    try:
+        for difficulty in ('Easy', 'Hard'):
+            db.add_questions([(f"{difficulty} question {i}?", 'a', 'b', 'c', 'd', 'A', 'Test', difficulty)
+                              for i in range(30)])
+
+        def mean_expected_accuracy(questions):
+            return sum(expected_accuracy(q.difficulty, 0, 0) for q in questions) / len(questions)
+
+        strong = selector.sample(10, accuracy=0.95)
+        weak = selector.sample(10, accuracy=0.2)
+        assert len(strong) == len(weak) == 10
+        assert all(q.difficulty == 'Hard' for q in strong)
+        assert all(q.difficulty == 'Easy' for q in weak)
+        assert mean_expected_accuracy(strong) < mean_expected_accuracy(weak)
+    finally:
+        selector.close()
+        db.close()
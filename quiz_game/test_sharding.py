@@ -0,0 +1,58 @@
+from database import Database
+from sharding import ShardedDatabase, reshard
+
+NAMES = [f"player-{i}" for i in range(12)]
+
+
+def standings(db):
+    """name -> (best score, best total, best percentage, rank) for every player"""
+    result = {}
+    for name in NAMES:
+        stats = db.get_player_stats(name)
+        result[name] = (stats[2], stats[3], stats[4], db.get_player_rank(name)[0])
+    return result
+
+
+def answer_owners(db, players):
+    """Player name behind each logged answer, in log order"""
+    with db.connection() as conn:
+        ids = [row[0] for row in conn.execute("SELECT player_id FROM answers ORDER BY id")]
+    return [players(player_id) for player_id in ids]
+
+
+def test_reshard_keeps_scores_ranks_and_answer_owners(tmp_path):
+    path = str(tmp_path / "quiz.db")
+    db = Database(path)
+    ids = {}
+    for i, name in enumerate(NAMES):
+        ids[name] = db.add_player(name)
+        for score in (i % 5, (i * 3) % 6):
+            db.save_score(ids[name], score, 5)
+    db.save_answers([(ids[name], 1, 'A', i % 2, 100, '2024-01-01 00:00:00') for i, name in enumerate(NAMES)])
+    expected = standings(db)
+    by_id = {player_id: name for name, player_id in ids.items()}
+    assert answer_owners(db, by_id.get) == NAMES
+    db.close()
+
+    for from_shards, to_shards in ((1, 3), (3, 2)):
+        assert reshard(path, from_shards, to_shards, batch_size=5) == (len(NAMES), 2 * len(NAMES))
+
+        sharded = ShardedDatabase(path, to_shards)
+        try:
+            counts = [0, 0]
+            for shard in sharded.shards:
+                with shard.connection() as conn:
+                    counts[0] += conn.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+                    counts[1] += conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+            assert counts == [len(NAMES), 2 * len(NAMES)]
+            assert standings(sharded) == expected
+            assert sharded.check_leaderboard() == []
+
+            def name_of(player_id):
+                shard, local_id = sharded._split(player_id)
+                with shard.connection() as conn:
+                    return conn.execute("SELECT name FROM players WHERE id = ?", (local_id,)).fetchone()[0]
+
+            assert answer_owners(sharded, name_of) == NAMES
+        finally:
+            sharded.close()
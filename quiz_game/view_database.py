@@ -2,13 +2,34 @@
 """
 Database Viewer for Quiz Game
 Simple script to view and explore the SQLite database contents
+
+Usage:
+    python view_database.py [--instrument]
+    python view_database.py --all scores [--output scores.csv]
+    python view_database.py --report [--json]
+    python view_database.py --stats stats.json
+    python view_database.py --search "capital france" [--limit 20]
+
+--all streams a whole table as CSV (stdout unless --output is given) in
+rowid order, holding only --batch-size rows in memory at a time.
+
+--stats prints a report from a stats file written by a process that ran with
+QUIZ_GAME_INSTRUMENT=1 and QUIZ_GAME_STATS_FILE set.
 """
 
-import sqlite3
+import argparse
+import csv
+import json
 import os
+import sqlite3
 import sys
 from datetime import datetime
 
+from connection_pool import is_uri
+from database import Database, default_location
+from instrumentation import format_report
+from quiz_stats import compute_statistics, format_statistics
+
 # Fix Windows console encoding
 if sys.platform == "win32":
     try:
@@ -17,28 +38,60 @@ if sys.platform == "win32":
     except:
         pass
 
-def connect_to_database():
-    """Connect to the quiz game database"""
-    db_path = os.path.join(os.path.dirname(__file__), 'quiz_game.db')
-    if not os.path.exists(db_path):
+def connect_to_database(instrument=None):
+    """Open the quiz game database through the shared connection pool"""
+    location = default_location()
+    if not is_uri(location) and not os.path.exists(location):
         print("❌ Database file not found! Run the quiz game first to create it.")
         return None
-    return sqlite3.connect(db_path)
+    return Database(location, instrument=instrument)
 
 def show_tables(conn):
     """Show all tables in the database"""
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = cursor.fetchall()
+    tables = viewable_tables(conn)
     print("📋 Database Tables:")
     for table in tables:
-        print(f"  • {table[0]}")
-    return [table[0] for table in tables]
+        print(f"  • {table}")
+    return tables
+
+# Internal tables an FTS5 virtual table keeps its index in, named <table>_<suffix>
+FTS_SHADOW_SUFFIXES = ('data', 'idx', 'content', 'docsize', 'config')
+
+def viewable_tables(conn):
+    """Names of the user tables; the only names the viewer will put into SQL
+    
+    Full-text search shadow tables are left out; the search index itself is
+    listed under its virtual table name.
+    """
+    cursor = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\' ORDER BY name")
+    rows = cursor.fetchall()
+    shadow = {f"{name}_{suffix}" for name, sql in rows
+              if sql and sql.upper().startswith('CREATE VIRTUAL TABLE') for suffix in FTS_SHADOW_SUFFIXES}
+    return [name for name, _ in rows if name not in shadow]
+
+def checked_table(conn, table_name):
+    """Return ``table_name`` quoted for SQL, or raise ValueError if it is not a known table
+    
+    Paging and exports walk the rowid, so WITHOUT ROWID tables are rejected too.
+    """
+    if table_name not in viewable_tables(conn):
+        raise ValueError(f"Unknown table: {table_name!r}")
+    table = '"' + table_name.replace('"', '""') + '"'
+    try:
+        conn.execute(f"SELECT rowid FROM {table} LIMIT 0")
+    except sqlite3.OperationalError:
+        raise ValueError(f"Table {table_name!r} has no rowid and cannot be paged") from None
+    return table
+
+def table_columns(conn, table_name):
+    """Column names of a table"""
+    return [row[0] for row in conn.execute("SELECT name FROM pragma_table_info(?)", (table_name,))]
 
 def show_table_structure(conn, table_name):
     """Show the structure of a specific table"""
     cursor = conn.cursor()
-    cursor.execute(f"PRAGMA table_info({table_name});")
+    cursor.execute('SELECT cid, name, type, "notnull", dflt_value FROM pragma_table_info(?)', (table_name,))
     columns = cursor.fetchall()
     print(f"\n🏗️  Structure of '{table_name}' table:")
     print("   Column Name    | Type    | Not Null | Default")
@@ -46,131 +99,268 @@ def show_table_structure(conn, table_name):
     for col in columns:
         print(f"   {col[1]:<15} | {col[2]:<7} | {col[3]:<8} | {col[4] or 'None'}")
 
-def show_table_data(conn, table_name, limit=10):
-    """Show data from a specific table"""
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-    total_rows = cursor.fetchone()[0]
+def fetch_page(conn, table_name, after=0, limit=10):
+    """Return up to ``limit`` (rowid, row) pairs with rowid greater than ``after``
     
-    cursor.execute(f"SELECT * FROM {table_name} LIMIT {limit}")
-    rows = cursor.fetchall()
+    Keyset paging: each page is a rowid range seek, so page 1000 costs the
+    same as page 1.
+    """
+    table = checked_table(conn, table_name)
+    cursor = conn.execute(f"SELECT rowid, * FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?", (after, limit))
+    return [(row[0], row[1:]) for row in cursor.fetchall()]
+
+def stream_rows(conn, table_name, batch_size=1000):
+    """Yield every row of a table in rowid order, ``batch_size`` rows in memory at a time"""
+    table = checked_table(conn, table_name)
+    cursor = conn.execute(f"SELECT * FROM {table} ORDER BY rowid")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+def estimated_rows(conn, table_name):
+    """Upper estimate of a table's row count from MAX(rowid), a single index seek
     
-    # Get column names
-    cursor.execute(f"PRAGMA table_info({table_name});")
-    columns = [col[1] for col in cursor.fetchall()]
+    Exact unless rows were deleted.
+    """
+    return conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {checked_table(conn, table_name)}").fetchone()[0]
+
+def show_table_data(conn, table_name, limit=10):
+    """Page through a table, ``limit`` rows at a time"""
+    estimate = estimated_rows(conn, table_name)
+    columns = table_columns(conn, table_name)
+    of_total = f" of ~{estimate}" if estimate else ""
+    header = " | ".join(f"{col[:15]:<15}" for col in columns)
     
-    print(f"\n📊 Data from '{table_name}' table (showing {len(rows)} of {total_rows} rows):")
-    if rows:
-        # Print header
-        header = " | ".join(f"{col[:15]:<15}" for col in columns)
+    shown = 0
+    after = 0
+    while True:
+        page = fetch_page(conn, table_name, after, limit)
+        if not page:
+            if not shown:
+                print(f"\n📊 Data from '{table_name}' table:")
+                print("   No data found in this table.")
+            return
+        
+        print(f"\n📊 Data from '{table_name}' table (rows {shown + 1}-{shown + len(page)}{of_total}):")
         print("   " + header)
         print("   " + "-" * len(header))
-        
-        # Print data rows
-        for row in rows:
+        for rowid, row in page:
             row_str = " | ".join(f"{str(val)[:15]:<15}" for val in row)
             print("   " + row_str)
-    else:
-        print("   No data found in this table.")
+        
+        shown += len(page)
+        after = page[-1][0]
+        if len(page) < limit:
+            return
+        more = input("\nPress Enter for the next page, or 'q' to stop: ")
+        if more.strip().lower() == 'q':
+            return
+
+def export_table(conn, table_name, output=None, batch_size=1000):
+    """Stream a whole table as CSV to ``output`` (a path) or stdout; returns the row count
+    
+    Raises ValueError for an unknown table before ``output`` is created.
+    """
+    checked_table(conn, table_name)
+    columns = table_columns(conn, table_name)
+    rows = stream_rows(conn, table_name, batch_size)
+    if output is None:
+        return write_csv(sys.stdout, columns, rows)
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        return write_csv(f, columns, rows)
+
+def write_csv(f, columns, rows):
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+def show_search_results(db, terms, limit=20):
+    """Print the questions matching a full-text search"""
+    results = db.search_questions(terms, limit)
+    if not results:
+        print(f"\n🔍 No questions match {terms!r}.")
+        return 0
+    print(f"\n🔍 Questions matching {terms!r}:")
+    print(f"   {'ID':<7} {'Category':<12} {'Difficulty':<10} Question")
+    print("   " + "-" * 60)
+    for question_id, text, category, difficulty in results:
+        print(f"   {question_id:<7} {category[:12]:<12} {difficulty:<10} {text}")
+    return len(results)
 
 def show_quiz_statistics(conn):
     """Show quiz game statistics"""
-    cursor = conn.cursor()
-    
-    print("\n📈 Quiz Game Statistics:")
-    
-    # Total questions
-    cursor.execute("SELECT COUNT(*) FROM questions")
-    total_questions = cursor.fetchone()[0]
-    print(f"   • Total Questions: {total_questions}")
-    
-    # Questions by category
-    cursor.execute("SELECT category, COUNT(*) FROM questions GROUP BY category")
-    categories = cursor.fetchall()
-    print("   • Questions by Category:")
-    for cat, count in categories:
-        print(f"     - {cat}: {count}")
-    
-    # Total players
-    cursor.execute("SELECT COUNT(*) FROM players")
-    total_players = cursor.fetchone()[0]
-    print(f"   • Total Players: {total_players}")
-    
-    # Total quiz attempts
-    cursor.execute("SELECT COUNT(*) FROM scores")
-    total_attempts = cursor.fetchone()[0]
-    print(f"   • Total Quiz Attempts: {total_attempts}")
-    
-    # Top 3 players
-    cursor.execute('''
-        SELECT p.name, MAX(ROUND((s.score * 100.0 / s.total_questions), 2)) as best_percentage
-        FROM scores s
-        JOIN players p ON s.player_id = p.id
-        GROUP BY p.name
-        ORDER BY best_percentage DESC
-        LIMIT 3
-    ''')
-    top_players = cursor.fetchall()
-    if top_players:
-        print("   • Top 3 Players:")
-        for i, (name, percentage) in enumerate(top_players, 1):
-            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉"
-            print(f"     {medal} {name}: {percentage}%")
-
-def interactive_menu():
+    print("\n" + format_statistics(compute_statistics(conn)))
+
+def show_instrumentation(db):
+    """Show query timing collected in this process"""
+    if db.instrumentation is None:
+        print("\n⏱️  Instrumentation is off. Start with --instrument or QUIZ_GAME_INSTRUMENT=1.")
+        return
+    print("\n⏱️  Query timing for this session:")
+    print(format_report(db.instrumentation.snapshot()))
+
+def show_stats_file(path):
+    """Print a report from a dumped stats file"""
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not read stats file: {e}")
+        return 1
+    print(f"⏱️  Query timing from {path}:")
+    print(format_report(snapshot))
+    return 0
+
+def interactive_menu(instrument=None):
     """Interactive menu for database exploration"""
-    conn = connect_to_database()
-    if not conn:
+    db = connect_to_database(instrument)
+    if not db:
         return
     
     try:
-        while True:
-            print("\n" + "="*50)
-            print("🎯 QUIZ GAME DATABASE VIEWER")
-            print("="*50)
-            print("1. Show all tables")
-            print("2. View questions")
-            print("3. View players")
-            print("4. View scores/history")
-            print("5. Show quiz statistics")
-            print("6. Show table structures")
-            print("7. Exit")
+        with db.connection() as conn:
+            run_menu(db, conn)
+    except KeyboardInterrupt:
+        print("\n\n👋 Database viewer closed.")
+    finally:
+        db.close()
+
+def run_menu(db, conn):
+    """Menu loop for an open connection"""
+    while True:
+        print("\n" + "="*50)
+        print("🎯 QUIZ GAME DATABASE VIEWER")
+        print("="*50)
+        print("1. Show all tables")
+        print("2. View questions")
+        print("3. View players")
+        print("4. View scores/history")
+        print("5. Show quiz statistics")
+        print("6. Show table structures")
+        print("7. Browse any table")
+        print("8. Show query timing stats")
+        print("9. Search questions")
+        print("10. Exit")
+        
+        choice = input("\nEnter your choice (1-10): ").strip()
+        
+        if choice == '1':
+            tables = show_tables(conn)
             
-            choice = input("\nEnter your choice (1-7): ").strip()
+        elif choice == '2':
+            show_table_data(conn, 'questions', 20)
             
-            if choice == '1':
-                tables = show_tables(conn)
-                
-            elif choice == '2':
-                show_table_data(conn, 'questions', 20)
-                
-            elif choice == '3':
-                show_table_data(conn, 'players')
-                
-            elif choice == '4':
-                show_table_data(conn, 'scores', 15)
-                
-            elif choice == '5':
-                show_quiz_statistics(conn)
-                
-            elif choice == '6':
-                tables = show_tables(conn)
-                for table in tables:
-                    show_table_structure(conn, table)
-                    
-            elif choice == '7':
-                print("\n👋 Thanks for exploring the database!")
-                break
-                
-            else:
-                print("❌ Invalid choice. Please enter 1-7.")
+        elif choice == '3':
+            show_table_data(conn, 'players')
+            
+        elif choice == '4':
+            show_table_data(conn, 'scores', 15)
+            
+        elif choice == '5':
+            show_quiz_statistics(conn)
+            
+        elif choice == '6':
+            tables = show_tables(conn)
+            for table in tables:
+                show_table_structure(conn, table)
                 
-            input("\nPress Enter to continue...")
+        elif choice == '7':
+            show_tables(conn)
+            table_name = input("\nTable name: ").strip()
+            try:
+                show_table_data(conn, table_name, 20)
+            except (ValueError, sqlite3.Error) as e:
+                print(f"❌ {e}")
             
-    except KeyboardInterrupt:
-        print("\n\n👋 Database viewer closed.")
+        elif choice == '8':
+            show_instrumentation(db)
+            
+        elif choice == '9':
+            terms = input("\nSearch for: ").strip()
+            if terms:
+                show_search_results(db, terms)
+            
+        elif choice == '10':
+            print("\n👋 Thanks for exploring the database!")
+            break
+            
+        else:
+            print("❌ Invalid choice. Please enter 1-10.")
+            
+        input("\nPress Enter to continue...")
+
+def export_main(table_name, output, batch_size):
+    """Run the --all export; progress goes to stderr so stdout stays pure CSV"""
+    db = connect_to_database()
+    if not db:
+        return 1
+    try:
+        with db.connection() as conn:
+            count = export_table(conn, table_name, output, batch_size)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
     finally:
-        conn.close()
+        db.close()
+    print(f"✅ Exported {count} rows from '{table_name}'", file=sys.stderr)
+    return 0
+
+def report_main(as_json):
+    """Run the --report command"""
+    db = connect_to_database()
+    if not db:
+        return 1
+    try:
+        with db.connection() as conn:
+            report = compute_statistics(conn)
+    finally:
+        db.close()
+    if as_json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_statistics(report))
+    return 0
+
+def search_main(terms, limit):
+    """Run the --search command"""
+    db = connect_to_database()
+    if not db:
+        return 1
+    try:
+        show_search_results(db, terms, limit)
+    finally:
+        db.close()
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--instrument', action='store_true', help="time the viewer's own queries")
+    parser.add_argument('--stats', metavar='FILE', help="print a report from a stats dump and exit")
+    parser.add_argument('--report', action='store_true', help="print the statistics report and exit")
+    parser.add_argument('--json', action='store_true', help="print --report as JSON")
+    parser.add_argument('--all', metavar='TABLE', help="export every row of TABLE as CSV and exit")
+    parser.add_argument('--output', metavar='FILE', help="CSV file for --all (default: stdout)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="rows fetched per batch for --all")
+    parser.add_argument('--search', metavar='TERMS', help="full-text search the questions and exit")
+    parser.add_argument('--limit', type=int, default=20, help="results shown by --search")
+    args = parser.parse_args()
+    
+    if args.stats:
+        return show_stats_file(args.stats)
+    if args.all:
+        return export_main(args.all, args.output, args.batch_size)
+    if args.report:
+        return report_main(args.json)
+    if args.search:
+        return search_main(args.search, args.limit)
+    interactive_menu(True if args.instrument else None)
+    return 0
 
 if __name__ == "__main__":
-    interactive_menu()
+    sys.exit(main())
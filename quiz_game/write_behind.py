@@ -0,0 +1,197 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from metrics import summarize
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """Buffer writes in memory and flush them in batches from a background thread
+
+    A flush happens when ``batch_size`` items are waiting or ``flush_interval``
+    seconds have passed since the oldest unflushed item, whichever comes
+    first. ``flush_batch(items)`` is expected to write the whole batch in one
+    transaction. A failed batch is put back at the front of the queue and
+    retried on the next flush. After ``max_retries`` failures in a row its
+    items are written one at a time, and any item that still fails goes to
+    ``dead_letters`` (and is appended to ``dead_letter_path`` as JSON, if
+    set) so it cannot hold up the items queued behind it.
+    """
+
+    def __init__(self, flush_batch, batch_size=100, flush_interval=1.0, name='write-behind',
+                 max_retries=3, dead_letter_path=None):
+        self.flush_batch = flush_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.dead_letter_path = dead_letter_path
+        self.name = name
+
+        self._items = []
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+
+        self.flushed_items = 0
+        self.flushed_batches = 0
+        self.failed_batches = 0
+        self.max_depth = 0
+        self.last_error = None
+        self.dead_letters = []
+        self._failures = 0
+        self._latencies = deque(maxlen=1000)
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        """Queue one item for the next batch"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            if not self._items:
+                self._oldest = time.monotonic()
+            self._items.append(item)
+            self.max_depth = max(self.max_depth, len(self._items))
+            if len(self._items) >= self.batch_size:
+                self._cond.notify()
+
+    @property
+    def depth(self):
+        """Number of items waiting to be flushed"""
+        return len(self._items)
+
+    def flush(self):
+        """Write everything queued so far, in batches, before returning"""
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = self._items[:self.batch_size]
+                    del self._items[:self.batch_size]
+                    self._oldest = time.monotonic() if self._items else None
+                if not batch:
+                    return
+                if not self._write(batch):
+                    return
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            self.flush_batch(batch)
+        except Exception as e:
+            self.failed_batches += 1
+            self.last_error = e
+            self._failures += 1
+            if self._failures < self.max_retries:
+                logger.warning("%s: flush of %d items failed (attempt %d of %d), will retry: %s",
+                               self.name, len(batch), self._failures, self.max_retries, e)
+                with self._cond:
+                    self._items[:0] = batch
+                    self._oldest = time.monotonic()
+                return False
+            logger.error("%s: flush of %d items failed %d times, writing them one by one: %s",
+                         self.name, len(batch), self._failures, e)
+            self._failures = 0
+            self._write_each(batch)
+            return True
+        self._failures = 0
+        self._latencies.append((time.perf_counter() - started) * 1000)
+        self.flushed_items += len(batch)
+        self.flushed_batches += 1
+        return True
+
+    def _write_each(self, batch):
+        """Write a failing batch item by item, dead-lettering the items that fail"""
+        for item in batch:
+            try:
+                self.flush_batch([item])
+            except Exception as e:
+                self._dead_letter(item, e)
+            else:
+                self.flushed_items += 1
+                self.flushed_batches += 1
+
+    def _dead_letter(self, item, error):
+        logger.error("%s: moved %r to the dead-letter store: %s", self.name, item, error)
+        self.dead_letters.append((item, repr(error)))
+        if self.dead_letter_path:
+            try:
+                with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'queue': self.name, 'item': item, 'error': repr(error)}, default=str) + "\n")
+            except OSError as e:
+                logger.error("%s: could not write to %s: %s", self.name, self.dead_letter_path, e)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if len(self._items) >= self.batch_size:
+                        break
+                    if self._items:
+                        remaining = self._oldest + self.flush_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def close(self):
+        """Flush everything and stop the background thread
+
+        Failing batches are retried until they are written or dead-lettered,
+        so nothing queued is dropped.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        while self._items:
+            self.flush()
+
+    def metrics(self):
+        """Queue depth, throughput and flush latency (ms) so far"""
+        return {
+            'queue_depth': self.depth,
+            'max_queue_depth': self.max_depth,
+            'flushed_items': self.flushed_items,
+            'flushed_batches': self.flushed_batches,
+            'failed_batches': self.failed_batches,
+            'dead_letters': len(self.dead_letters),
+            'flush_latency_ms': summarize(list(self._latencies)),
+        }
+
+
+class ScoreWriter(WriteBehindQueue):
+    """Write-behind replacement for ``Database.save_score``
+
+    Scores are stamped with the time they were submitted, so batching does
+    not change the recorded ``quiz_date``. They are checked when queued,
+    because a bad row would otherwise only fail later, in the background.
+    """
+
+    def __init__(self, db, batch_size=100, flush_interval=1.0, **kwargs):
+        super().__init__(db.save_scores, batch_size, flush_interval, name='score-writer', **kwargs)
+        self.db = db
+
+    def save_score(self, player_id, score, total_questions):
+        """Queue a score; same signature as ``Database.save_score``
+
+        Raises ValueError unless 0 <= score <= total_questions and
+        total_questions is positive.
+        """
+        if not isinstance(total_questions, int) or total_questions <= 0:
+            raise ValueError(f"total_questions must be a positive integer, got {total_questions!r}")
+        if not isinstance(score, int) or not 0 <= score <= total_questions:
+            raise ValueError(f"score must be between 0 and {total_questions}, got {score!r}")
+        quiz_date = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self.put((player_id, score, total_questions, quiz_date))